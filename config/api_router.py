@@ -1,6 +1,12 @@
 from django.conf import settings
 from rest_framework.routers import DefaultRouter, SimpleRouter
 
+from gym_management_system.core.api.views import (
+    ClientViewSet,
+    MembershipTypeViewSet,
+    MembershipViewSet,
+    TransactionViewSet,
+)
 from gym_management_system.users.api.views import UserViewSet
 
 if settings.DEBUG:
@@ -9,6 +15,10 @@ else:
     router = SimpleRouter()
 
 router.register("users", UserViewSet)
+router.register("clients", ClientViewSet)
+router.register("memberships", MembershipViewSet)
+router.register("membership-types", MembershipTypeViewSet)
+router.register("transactions", TransactionViewSet)
 
 
 app_name = "api"
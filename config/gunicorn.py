@@ -0,0 +1,17 @@
+"""Gunicorn settings for production (see compose/production/django/start)."""
+import os
+
+from prometheus_client import multiprocess
+
+# Threaded workers: a sync worker is killed once a single request runs past `timeout`, which
+# streamed CSV exports and admin imports of large files do. A gthread worker's main loop keeps
+# notifying the arbiter while its threads serve requests, so `timeout` only restarts workers
+# that are stuck, and no request is cut short however long it runs.
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", "4"))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "30"))
+
+
+def child_exit(server, worker):
+    # drop the live-process gauges of a worker that exited, so /metrics stops reporting it
+    multiprocess.mark_process_dead(worker.pid)
@@ -61,6 +61,7 @@ DJANGO_APPS = [
     "django.contrib.staticfiles",
     # "django.contrib.humanize", # Handy template tags
     "django.contrib.admin",
+    "django.contrib.postgres",
     "django.forms",
 ]
 THIRD_PARTY_APPS = [
@@ -302,3 +303,22 @@ DATETIME_FORMAT = "Y-m-d H:i:s"
 DATETIME_INPUT_FORMATS = ["%Y-%m-%d %H:%M:%S"]
 TIME_FORMAT = "H:i:s"
 TIME_INPUT_FORMATS = ["%H:%M:%S"]
+
+# Membership reminders
+# ------------------------------------------------------------------------------
+# how send_membership_reminders delivers messages; see gym_management_system.core.reminders
+MEMBERSHIP_REMINDER_BACKEND = env(
+    "MEMBERSHIP_REMINDER_BACKEND", default="gym_management_system.core.reminders.ConsoleBackend"
+)
+# used by gym_management_system.core.reminders.FileBackend
+MEMBERSHIP_REMINDER_FILE_PATH = env("MEMBERSHIP_REMINDER_FILE_PATH", default=str(BASE_DIR / "reminders.log"))
+
+# Transaction partitions
+# ------------------------------------------------------------------------------
+# "month" or "year": the period of each core_transaction partition; see gym_management_system.core.partitions
+TRANSACTION_PARTITION_INTERVAL = env("TRANSACTION_PARTITION_INTERVAL", default="month")
+
+# Metrics
+# ------------------------------------------------------------------------------
+# bearer token a Prometheus scraper sends to /metrics; staff users can read it without one
+METRICS_TOKEN = env("METRICS_TOKEN", default="")
@@ -12,6 +12,11 @@ ALLOWED_HOSTS = env.list("DJANGO_ALLOWED_HOSTS", default=["example.com"])
 # ------------------------------------------------------------------------------
 DATABASES["default"]["CONN_MAX_AGE"] = env.int("CONN_MAX_AGE", default=60)  # noqa: F405
 
+# MIDDLEWARE
+# ------------------------------------------------------------------------------
+# per-request query, cache and template timings in the log and a Server-Timing header
+MIDDLEWARE.insert(0, "gym_management_system.core.instrumentation.RequestMetricsMiddleware")  # noqa: F405
+
 # CACHES
 # ------------------------------------------------------------------------------
 CACHES = {
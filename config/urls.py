@@ -7,9 +7,9 @@ from django.views.generic import TemplateView
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 from rest_framework.authtoken.views import obtain_auth_token
 
-urlpatterns = [
-    path("", admin.site.urls),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+from gym_management_system.core.views import metrics_view
+
+urlpatterns = static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
 
 # API URLS
 urlpatterns += [
@@ -25,6 +25,17 @@ urlpatterns += [
     ),
 ]
 
+# Prometheus metrics
+urlpatterns += [
+    path("metrics", metrics_view, name="metrics"),
+]
+
+# the admin is served from the site root, so it goes last: its catch-all view would
+# otherwise swallow every URL above
+urlpatterns += [
+    path("", admin.site.urls),
+]
+
 if settings.DEBUG:
     # This allows the error pages to be debugged during development, just visit
     # these url in browser to see how these error pages look like.
@@ -1,24 +1,142 @@
-from django.contrib import admin
-from django.utils.html import format_html
-from django.urls import reverse
-from .models import Client, MembershipType, Membership, Transaction, Gym
-from django.urls import path
-from django.shortcuts import render
-from django.db.models import Count, Sum
-from .forms import MembershipForm
+import io
+
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied, ValidationError
+from django.db import transaction
+from django.db.models import F
+from django.http import FileResponse
+from django.shortcuts import get_object_or_404, render
+from django.urls import path, reverse
+from django.utils.decorators import method_decorator
 from django.utils.html import format_html
 from django.utils.translation import gettext_lazy as _
 
+from .admin_filters import AutocompleteFilter
+from .admin_mixins import CheapCountAdminMixin, ListRelatedAdminMixin
+from .exports import export_clients, export_transactions
+from .forms import ClientForm, ImportForm, MembershipForm, RenewMembershipsForm, StatisticsPeriodForm
+from .imports import IMPORTERS
+from .models import MEMBERSHIP_STATUSES, Client, Gym, Membership, MembershipType, ReportJob, Transaction
+from .statistics import gym_statistics, membership_type_statistics
+
 
 class MembershipInline(admin.StackedInline):
     model = Membership
     extra = 0
 
+    def get_queryset(self, request):
+        # each inline's title is str(membership), which shows the client and the type
+        return super().get_queryset(request).select_related("client", "membership_type")
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        formfield = super().formfield_for_foreignkey(db_field, request, **kwargs)
+        if db_field.name == "membership_type":
+            # load the choices once for the formset instead of once per inline form
+            formfield.choices = list(formfield.choices)
+        return formfield
+
+
+class MembershipStatusFilter(admin.SimpleListFilter):
+    title = _("Membership Status")
+    parameter_name = "membership_status"
+
+    def lookups(self, request, model_admin):
+        return MEMBERSHIP_STATUSES
+
+    def queryset(self, request, queryset):
+        if self.value():
+            # ClientAdmin.get_queryset() has already annotated the status
+            return queryset.filter(membership_status_code=self.value())
+        return queryset
+
 
-class ClientAdmin(admin.ModelAdmin):
-    list_display = ("name", "phone", "gym", "last_membership_day", "membership_status_indicator")
+class ClientAdmin(ListRelatedAdminMixin, CheapCountAdminMixin, admin.ModelAdmin):
+    list_display = ("name", "phone", "gym", "last_membership_day", "membership_status_indicator", "current_balance")
+    list_filter = (MembershipStatusFilter,)
     search_fields = ("name", "phone")
+    form = ClientForm
     inlines = [MembershipInline]
+    actions = ["renew_memberships", "export_csv"]
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        match = request.resolver_match
+        if match and match.view_name == f"{self.admin_site.name}:autocomplete":
+            # the autocomplete boxes show names only, a page at a time in client_name_idx order
+            return queryset.order_by("name", "pk")
+        return queryset.with_membership_status()
+
+    def get_search_results(self, request, queryset, search_term):
+        # one indexed lookup on either the phone or the name, instead of icontains on both
+        return queryset.search(search_term), False
+
+    @admin.action(description=_("Renew memberships of selected clients"), permissions=["add_membership"])
+    def renew_memberships(self, request, queryset):
+        form = RenewMembershipsForm(request.POST if "apply" in request.POST else None)
+        if form.is_valid():
+            memberships = Membership.objects.renew(
+                queryset,
+                form.cleaned_data["membership_type"],
+                add_income_transaction=form.cleaned_data["add_income_transaction"],
+            )
+            self.message_user(
+                request, _("Renewed the memberships of {0} clients.").format(len(memberships)), messages.SUCCESS
+            )
+            return None
+        context = {
+            **self.admin_site.each_context(request),
+            "title": _("Renew memberships"),
+            "form": form,
+            "queryset": queryset,
+            "opts": self.model._meta,
+            "action_checkbox_name": admin.helpers.ACTION_CHECKBOX_NAME,
+        }
+        return render(request, "core/admin/renew_memberships.html", context)
+
+    def has_add_membership_permission(self, request):
+        return request.user.has_perm("core.add_membership")
+
+    @admin.action(description=_("Export selected clients as CSV"), permissions=["view"])
+    def export_csv(self, request, queryset):
+        return export_clients(queryset)
+
+    def get_urls(self):
+        urls = super().get_urls()
+        my_urls = [
+            path("import/", self.admin_site.admin_view(self.import_view), name="core_client_import"),
+        ]
+        return my_urls + urls
+
+    # each chunk of the file commits on its own, rather than the whole upload in the request's transaction
+    @method_decorator(transaction.non_atomic_requests)
+    def import_view(self, request):
+        if not self.has_add_permission(request):
+            raise PermissionDenied
+        form = ImportForm(request.POST or None, request.FILES or None)
+        importer = None
+        if form.is_valid():
+            importer = IMPORTERS[form.cleaned_data["kind"]]()
+            file = io.TextIOWrapper(form.cleaned_data["file"], encoding="utf-8-sig", newline="")
+            try:
+                importer.run(file)
+            except ValidationError as error:
+                form.add_error("file", error)
+                importer = None
+            except UnicodeDecodeError:
+                # the chunks before the undecodable part are already committed
+                form.add_error(
+                    "file",
+                    _("The file is not UTF-8 encoded; the import stopped after {0} rows.").format(importer.created),
+                )
+
+        context = {
+            **self.admin_site.each_context(request),
+            "title": _("Import CSV"),
+            "form": form,
+            "importer": importer,
+            "opts": self.model._meta,
+        }
+        return render(request, "core/admin/import.html", context)
 
     def membership_status_indicator(self, obj):
         status, status_label = obj.membership_status()
@@ -31,25 +149,63 @@ class ClientAdmin(admin.ModelAdmin):
         else:
             return format_html('<span style="color: green; font-size:2em;">&#x25CF;</span>')
 
+    # ordering by the latest end date groups clients by status: none, expired, expiring soon, active
+    membership_status_indicator.admin_order_field = F("latest_end_date").asc(nulls_first=True)
     membership_status_indicator.short_description = _("Membership Status")
 
     def last_membership_day(self, obj):
         return obj.last_membership_day()
 
+    last_membership_day.admin_order_field = "latest_end_date"
     last_membership_day.short_description = _("Last Membership Day")
 
     class Media:
         js = ("js/client_admin.js",)
 
 
-class MembershipTypeAdmin(admin.ModelAdmin):
+class MembershipTypeAdmin(ListRelatedAdminMixin, admin.ModelAdmin):
     list_display = ("name", "duration_months", "price")
+    ordering = ("name",)
+    search_fields = ("name",)
+
+    def get_urls(self):
+        urls = super().get_urls()
+        my_urls = [
+            path(
+                "statistics/",
+                self.admin_site.admin_view(self.statistics_view),
+                name="core_membershiptype_statistics",
+            ),
+        ]
+        return my_urls + urls
+
+    def statistics_view(self, request):
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        form = StatisticsPeriodForm(request.GET or None)
+        start_date = end_date = None
+        if form.is_valid():
+            start_date, end_date = form.cleaned_data["start_date"], form.cleaned_data["end_date"]
+
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "form": form,
+            "membership_types": membership_type_statistics(start_date, end_date),
+            "title": _("Membership Type Statistics"),
+        }
+        return render(request, "core/admin/membership_type_statistics.html", context)
 
 
-class MembershipAdmin(admin.ModelAdmin):
+class MembershipAdmin(ListRelatedAdminMixin, CheapCountAdminMixin, admin.ModelAdmin):
     list_display = ("client", "membership_type", "formatted_start_date", "formatted_end_date")
-    list_filter = ("client", "membership_type", "start_date", "end_date")
+    list_filter = (("client", AutocompleteFilter), "membership_type", "start_date", "end_date")
     search_fields = ("client__name", "membership_type__name")
+    autocomplete_fields = ("client", "membership_type")
+
+    @property
+    def media(self):
+        return super().media + AutocompleteFilter.get_media(Membership._meta.get_field("client"), self.admin_site)
 
     def formatted_start_date(self, obj):
         formatted_date = obj.start_date.strftime("%-d-%-m-%Y")
@@ -80,7 +236,7 @@ class MembershipAdmin(admin.ModelAdmin):
             )
 
 
-class TransactionAdmin(admin.ModelAdmin):
+class TransactionAdmin(ListRelatedAdminMixin, CheapCountAdminMixin, admin.ModelAdmin):
     list_display = (
         "transaction_icon",
         "transaction_type",
@@ -88,9 +244,15 @@ class TransactionAdmin(admin.ModelAdmin):
         "formatted_date",
         "description",
         "related_client",
+        "gym",
     )
-    list_filter = ("transaction_type", "date")
+    list_filter = ("transaction_type", "date", "gym")
     search_fields = ("description",)
+    actions = ["export_csv"]
+
+    @admin.action(description=_("Export selected transactions as CSV"), permissions=["view"])
+    def export_csv(self, request, queryset):
+        return export_transactions(queryset)
 
     def formatted_date(self, obj):
         formatted_date = obj.date.strftime("%-d-%-m-%Y")
@@ -115,29 +277,37 @@ class TransactionAdmin(admin.ModelAdmin):
         return None
 
     related_client.short_description = _("Related Client")
+    related_client.related_fields = ("client",)
 
 
-class GymAdmin(admin.ModelAdmin):
+class GymAdmin(ListRelatedAdminMixin, admin.ModelAdmin):
     list_display = ("name", "address", "phone", "email", "total_clients", "total_income", "total_expenses", "balance")
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_financials()
+
     def total_income(self, obj):
         return obj.total_income()
 
+    total_income.admin_order_field = "income"
     total_income.short_description = _("Total Income")
 
     def total_clients(self, obj):
         return obj.total_clients()
 
+    total_clients.admin_order_field = "client_count"
     total_clients.short_description = _("Total Clients")
 
     def total_expenses(self, obj):
         return obj.total_expenses()
 
+    total_expenses.admin_order_field = "expenses"
     total_expenses.short_description = _("Total expenses")
 
     def balance(self, obj):
         return obj.balance()
 
+    balance.admin_order_field = "net_balance"
     balance.short_description = _("Balance")
 
     def get_urls(self):
@@ -148,25 +318,77 @@ class GymAdmin(admin.ModelAdmin):
         return my_urls + urls
 
     def statistics_view(self, request):
-        gyms = Gym.objects.annotate(
-            total_clients=Count("client"),
-            total_income=Sum(
-                "client__transaction__amount", filter=models.Q(client__transaction__transaction_type="income")
-            ),
-            total_expenses=Sum(
-                "client__transaction__amount", filter=models.Q(client__transaction__transaction_type="expense")
-            ),
-        )
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        form = StatisticsPeriodForm(request.GET or None)
+        start_date = end_date = None
+        if form.is_valid():
+            start_date, end_date = form.cleaned_data["start_date"], form.cleaned_data["end_date"]
 
         context = {
-            "gyms": gyms,
+            **self.admin_site.each_context(request),
+            "form": form,
+            "gyms": gym_statistics(start_date, end_date),
             "title": _("Gym Statistics"),
         }
         return render(request, "core/admin/gym_statistics.html", context)
 
 
+class ReportJobAdmin(ListRelatedAdminMixin, admin.ModelAdmin):
+    list_display = ("__str__", "gym", "start_date", "end_date", "status", "progress_bar", "created_at", "download")
+    list_filter = ("kind", "status")
+    fields = ("kind", "gym", "start_date", "end_date")
+
+    def get_fields(self, request, obj=None):
+        if obj is None:
+            return self.fields
+        return self.fields + ("requested_by", "status", "progress", "created_at", "finished_at", "download", "error")
+
+    def get_readonly_fields(self, request, obj=None):
+        if obj is None:
+            return ()
+        return self.get_fields(request, obj)
+
+    def save_model(self, request, obj, form, change):
+        if not change:
+            obj.requested_by = request.user
+        super().save_model(request, obj, form, change)
+
+    def progress_bar(self, obj):
+        return format_html('<progress value="{}" max="100"></progress> {}%', obj.progress, obj.progress)
+
+    progress_bar.short_description = _("Progress")
+
+    def download(self, obj):
+        if not obj.output:
+            return None
+        url = reverse("admin:core_reportjob_download", args=[obj.pk])
+        return format_html('<a href="{}">{}</a>', url, _("Download"))
+
+    download.short_description = _("Output")
+
+    def get_urls(self):
+        urls = super().get_urls()
+        my_urls = [
+            path(
+                "<int:pk>/download/",
+                self.admin_site.admin_view(self.download_view),
+                name="core_reportjob_download",
+            ),
+        ]
+        return my_urls + urls
+
+    def download_view(self, request, pk):
+        # served through the admin rather than MEDIA_URL, which may be publicly readable
+        job = get_object_or_404(ReportJob, pk=pk)
+        if not self.has_view_permission(request, job) or not job.output:
+            raise PermissionDenied
+        return FileResponse(job.output.open("rb"), as_attachment=True, filename=job.output.name.rsplit("/", 1)[-1])
+
+
 admin.site.register(Gym, GymAdmin)
 admin.site.register(Client, ClientAdmin)
 admin.site.register(MembershipType, MembershipTypeAdmin)
 admin.site.register(Membership, MembershipAdmin)
 admin.site.register(Transaction, TransactionAdmin)
+admin.site.register(ReportJob, ReportJobAdmin)
@@ -0,0 +1,50 @@
+from django import forms
+from django.contrib import admin
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.utils.translation import gettext_lazy as _
+
+
+class AutocompleteFilter(admin.FieldListFilter):
+    """
+    Filter on a foreign key with an autocomplete box, instead of one link per related object.
+
+    The box searches the related model's admin (which must define search_fields) through the
+    admin's autocomplete view, so rendering the filter looks up only the selected object. The
+    parameter is the same as RelatedFieldListFilter's, e.g. ``client__id__exact``. The ModelAdmin
+    must add ``AutocompleteFilter.get_media(...)`` to its media.
+    """
+
+    template = "admin/core/autocomplete_filter.html"
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        self.lookup_kwarg = f"{field_path}__{field.target_field.name}__exact"
+        self.lookup_val = params.get(self.lookup_kwarg)
+        super().__init__(field, request, params, model, model_admin, field_path)
+        self.title = getattr(field, "verbose_name", field_path)
+        self.formfield = forms.ModelChoiceField(
+            queryset=field.remote_field.model._default_manager.all(),
+            widget=AutocompleteSelect(field, model_admin.admin_site),
+            required=False,
+        )
+
+    @staticmethod
+    def get_media(field, admin_site):
+        return AutocompleteSelect(field, admin_site).media + forms.Media(js=["js/autocomplete_filter.js"])
+
+    def expected_parameters(self):
+        return [self.lookup_kwarg]
+
+    def has_output(self):
+        return True
+
+    def choices(self, changelist):
+        yield {
+            "selected": self.lookup_val is None,
+            "query_string": changelist.get_query_string(remove=[self.lookup_kwarg]),
+            "display": _("All"),
+        }
+
+    def widget(self):
+        return self.formfield.widget.render(
+            self.lookup_kwarg, self.lookup_val, attrs={"id": f"filter_{self.lookup_kwarg}", "style": "width: 100%"}
+        )
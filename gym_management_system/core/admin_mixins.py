@@ -0,0 +1,216 @@
+import hashlib
+import logging
+
+from django.conf import settings
+from django.contrib.admin.utils import lookup_field
+from django.contrib.admin.views.main import ChangeList
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models.constants import LOOKUP_SEP
+from django.utils.formats import number_format
+from django.utils.functional import cached_property
+from django.utils.translation import gettext as _
+
+from .instrumentation import RequestMetrics, record_cache_lookup
+
+logger = logging.getLogger(__name__)
+
+# tables with fewer estimated rows than this are counted exactly
+ESTIMATE_THRESHOLD = 10000
+# filtered changelists count at most this many rows
+COUNT_CAP = 10000
+# capped counts at least this large are cached for COUNT_CACHE_TIMEOUT seconds
+COUNT_CACHE_MIN = 1000
+COUNT_CACHE_TIMEOUT = 60
+
+
+def estimate_table_rows(model, using):
+    """The planner's row estimate for the model's table, or None if it has none (or isn't PostgreSQL)."""
+    connection = connections[using]
+    if connection.vendor != "postgresql":
+        return None
+    with connection.cursor() as cursor:
+        # a partitioned table's estimate is the sum of its (analyzed) partitions'
+        cursor.execute(
+            "SELECT CASE WHEN c.relkind = 'p' THEN COALESCE(("
+            "  SELECT SUM(p.reltuples) FILTER (WHERE p.reltuples > 0) FROM pg_partition_tree(c.oid) t"
+            "  JOIN pg_class p ON p.oid = t.relid WHERE t.isleaf"
+            "), -1) ELSE c.reltuples END::bigint FROM pg_class c WHERE c.oid = %s::regclass",
+            [model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    # -1 (or 0 before PostgreSQL 14) until the table has been vacuumed or analyzed
+    return row[0] if row and row[0] > 0 else None
+
+
+def capped_count(queryset, cap):
+    """COUNT(*) of at most ``cap + 1`` rows, cached for a while when large enough to be worth it."""
+    sql, params = queryset.query.sql_with_params()
+    key = "core:admin-count:" + hashlib.md5(repr((sql, params, cap)).encode()).hexdigest()
+    count = cache.get(key)
+    record_cache_lookup(hit=count is not None)
+    if count is None:
+        count = queryset.order_by()[: cap + 1].count()
+        if count >= COUNT_CACHE_MIN:
+            cache.set(key, count, COUNT_CACHE_TIMEOUT)
+    return count
+
+
+def cheap_count(queryset):
+    """
+    Count ``queryset`` without scanning a huge table, returning ``(count, label)``.
+
+    An unfiltered queryset over a large table is "counted" with the planner's estimate of the
+    table's rows; a filtered one is counted up to COUNT_CAP rows. ``label`` describes an
+    approximate count for display ("about 1,234,000", "more than 10,000"), and is None when
+    the count is exact.
+    """
+    if not queryset.query.has_filters():
+        estimate = estimate_table_rows(queryset.model, queryset.db)
+        if estimate is not None and estimate >= ESTIMATE_THRESHOLD:
+            return estimate, _("about {0}").format(number_format(estimate, force_grouping=True))
+        return queryset.count(), None
+    count = capped_count(queryset, COUNT_CAP)
+    if count > COUNT_CAP:
+        return COUNT_CAP, _("more than {0}").format(number_format(COUNT_CAP, force_grouping=True))
+    return count, None
+
+
+class CheapCountPaginator(Paginator):
+    count_label = None
+
+    @cached_property
+    def count(self):
+        count, self.count_label = cheap_count(self.object_list)
+        return count
+
+
+class CheapCountChangeList(ChangeList):
+    def get_results(self, request):
+        # the mixin turns show_full_result_count off so the base class skips its COUNT(*)
+        super().get_results(request)
+        self.result_count_label = self.paginator.count_label
+        self.full_result_count, self.full_result_count_label = cheap_count(self.root_queryset)
+        self.show_full_result_count = True
+        self.show_admin_actions = bool(self.full_result_count)
+
+
+class CheapCountAdminMixin:
+    """
+    Count the changelist's rows cheaply (see cheap_count) instead of running two COUNT(*)s.
+
+    The counts that are approximate are shown with an "about N" or "more than N" label by the
+    core admin's pagination and search form templates.
+    """
+
+    paginator = CheapCountPaginator
+    show_full_result_count = False
+
+    def get_changelist(self, request, **kwargs):
+        return CheapCountChangeList
+
+
+def split_relation_path(model, path):
+    """
+    Split a lookup such as "client__gym__name" into the relations to join and to prefetch.
+
+    Returns ``(select_related, prefetch_related)``: "client__gym__name" gives
+    ``("client__gym", None)``, and a path that crosses a many-valued relation, such as
+    "client__membership__membership_type", gives ``("client", "client__membership_set__membership_type")``.
+    """
+    joined, related, many = [], [], False
+    for part in path.lstrip("-").split(LOOKUP_SEP):
+        try:
+            field = model._meta.get_field(part)
+        except FieldDoesNotExist:
+            break
+        if not field.is_relation:
+            break
+        many = many or field.many_to_many or field.one_to_many
+        if not many:
+            joined.append(part)
+        # prefetch_related() follows reverse relations by their accessor, e.g. "membership_set"
+        related.append(field.get_accessor_name() if field.auto_created and not field.concrete else part)
+        model = field.related_model
+    return LOOKUP_SEP.join(joined) or None, LOOKUP_SEP.join(related) if many else None
+
+
+class ListRelatedAdminMixin:
+    """
+    Join or prefetch the relations the changelist columns use, derived from list_display.
+
+    Foreign keys in list_display are joined with select_related(), as are the relations in a
+    callable column's ``admin_order_field`` (e.g. "client__name") or in its ``related_fields``
+    (a tuple of lookups, for columns that aren't sortable); many-valued relations among those
+    are prefetched. An explicit list_select_related adds to the derived joins. With DEBUG on,
+    a column that still runs queries for each row is logged as a warning.
+    """
+
+    def get_list_related(self, request):
+        """The ``(select_related, prefetch_related)`` lookups of the changelist columns."""
+        select, prefetch = [], []
+        for name in self.get_list_display(request):
+            try:
+                paths = [self.model._meta.get_field(name).name]
+            except FieldDoesNotExist:
+                # found where lookup_field() finds it when displaying the column
+                if callable(name):
+                    column = name
+                elif name != "__str__" and hasattr(self, name):
+                    column = getattr(self, name)
+                else:
+                    column = getattr(self.model, name, None)
+                paths = list(getattr(column, "related_fields", ()))
+                if isinstance(getattr(column, "admin_order_field", None), str):
+                    paths.append(column.admin_order_field)
+            for path in paths:
+                joined, prefetched = split_relation_path(self.model, path)
+                if joined and joined not in select:
+                    select.append(joined)
+                if prefetched and prefetched not in prefetch:
+                    prefetch.append(prefetched)
+        return select, prefetch
+
+    def get_list_select_related(self, request):
+        configured = super().get_list_select_related(request)
+        if configured is True:
+            return True
+        configured = list(configured or ())
+        select, _prefetch = self.get_list_related(request)
+        return configured + [path for path in select if path not in configured]
+
+    def get_changelist_instance(self, request):
+        changelist = super().get_changelist_instance(request)
+        _select, prefetch = self.get_list_related(request)
+        if prefetch:
+            changelist.result_list = changelist.result_list.prefetch_related(*prefetch)
+        if settings.DEBUG:
+            self.warn_about_queries_per_row(changelist)
+        return changelist
+
+    def warn_about_queries_per_row(self, changelist):
+        """Log the columns that run queries to display the first row of the page."""
+        obj = next(iter(changelist.result_list), None)
+        if obj is None:
+            return
+        connection = connections[changelist.result_list.db]
+        for name in changelist.list_display:
+            if name == "action_checkbox":
+                continue
+            metrics = RequestMetrics()
+            with connection.execute_wrapper(metrics):
+                try:
+                    _field, _attr, value = lookup_field(name, obj, self)
+                    str(value)
+                except Exception:
+                    continue
+            if metrics.queries:
+                logger.warning(
+                    "%s: the %r column ran %d queries to display one row; name the relations it uses in its "
+                    "admin_order_field or related_fields, or in list_select_related",
+                    type(self).__name__,
+                    getattr(name, "__name__", name),
+                    metrics.queries,
+                )
@@ -0,0 +1,16 @@
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination on the primary key.
+
+    Each page is an index range scan starting after the last row of the previous page, so
+    fetching a page costs the same at the end of a large table as at its start, and no
+    COUNT(*) is run.
+    """
+
+    ordering = "pk"
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
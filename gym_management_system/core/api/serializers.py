@@ -0,0 +1,93 @@
+from django.core.validators import MaxLengthValidator
+from django.utils.translation import gettext_lazy as _
+from rest_framework import serializers
+
+from gym_management_system.core.models import (
+    MEMBERSHIP_STATUSES,
+    Client,
+    Membership,
+    MembershipType,
+    Transaction,
+    normalize_phone,
+)
+
+
+class PhoneNumberField(serializers.CharField):
+    """A phone number in any format, stored as its digits; the length limit applies to the digits."""
+
+    def __init__(self, *, max_digits=15, **kwargs):
+        super().__init__(**kwargs)
+        self.validators.append(
+            MaxLengthValidator(max_digits, message=_("Ensure this phone number has at most %(limit_value)d digits."))
+        )
+
+    def to_internal_value(self, data):
+        return normalize_phone(super().to_internal_value(data)) or ""
+
+
+class ClientSerializer(serializers.ModelSerializer):
+    membership_status = serializers.ChoiceField(
+        source="membership_status_code", choices=MEMBERSHIP_STATUSES, read_only=True
+    )
+    balance = serializers.DecimalField(source="current_balance", max_digits=14, decimal_places=2, read_only=True)
+    phone = PhoneNumberField(required=False, allow_blank=True, allow_null=True)
+
+    class Meta:
+        model = Client
+        fields = ["id", "url", "name", "phone", "gym", "membership_status", "membership_end_date", "balance"]
+        read_only_fields = ["membership_end_date"]
+
+        extra_kwargs = {
+            "url": {"view_name": "api:client-detail", "lookup_field": "pk"},
+        }
+
+
+class MembershipSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Membership
+        fields = ["id", "client", "membership_type", "start_date", "end_date"]
+
+    def validate(self, attrs):
+        if attrs["start_date"] > attrs["end_date"]:
+            raise serializers.ValidationError("The start date must be before the end date.")
+        return attrs
+
+
+class MembershipTypeSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = MembershipType
+        fields = ["id", "name", "duration_months", "price"]
+
+
+class StatisticsPeriodSerializer(serializers.Serializer):
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        start_date, end_date = attrs.get("start_date"), attrs.get("end_date")
+        if start_date and end_date and start_date > end_date:
+            raise serializers.ValidationError("The start date must be before the end date.")
+        return attrs
+
+
+class MembershipTypeStatisticsSerializer(serializers.Serializer):
+    id = serializers.IntegerField(source="pk")
+    name = serializers.CharField()
+    price = serializers.DecimalField(max_digits=10, decimal_places=2)
+    active_members = serializers.IntegerField()
+    total_members = serializers.IntegerField()
+    memberships_sold = serializers.IntegerField()
+    revenue = serializers.DecimalField(max_digits=14, decimal_places=2)
+    average_tenure = serializers.FloatField(allow_null=True, help_text="Days of membership of the type per member.")
+
+
+class TransactionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Transaction
+        fields = ["id", "transaction_type", "amount", "date", "description", "client", "gym"]
+
+    def validate(self, attrs):
+        client, gym = attrs.get("client"), attrs.get("gym")
+        if client and gym and gym.pk != client.gym_id:
+            raise serializers.ValidationError({"gym": _("A client's transactions belong to the client's gym.")})
+        return attrs
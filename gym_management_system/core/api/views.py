@@ -0,0 +1,105 @@
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.mixins import CreateModelMixin, ListModelMixin, RetrieveModelMixin, UpdateModelMixin
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.viewsets import GenericViewSet
+
+from gym_management_system.core.exports import export_clients, export_transactions
+from gym_management_system.core.models import Client, Membership, MembershipType, Transaction
+from gym_management_system.core.statistics import membership_type_statistics
+
+from .pagination import KeysetPagination
+from .serializers import (
+    ClientSerializer,
+    MembershipSerializer,
+    MembershipTypeSerializer,
+    MembershipTypeStatisticsSerializer,
+    StatisticsPeriodSerializer,
+    TransactionSerializer,
+)
+
+
+def get_id_param(request, name):
+    value = request.query_params.get(name)
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValidationError({name: "A valid integer is required."})
+
+
+class ClientViewSet(CreateModelMixin, RetrieveModelMixin, ListModelMixin, UpdateModelMixin, GenericViewSet):
+    serializer_class = ClientSerializer
+    queryset = Client.objects.all()
+    permission_classes = [IsAdminUser]
+    pagination_class = KeysetPagination
+    lookup_field = "pk"
+
+    def get_queryset(self):
+        queryset = self.queryset.with_stored_membership_status()
+        if gym := get_id_param(self.request, "gym"):
+            queryset = queryset.filter(gym=gym)
+        if status := self.request.query_params.get("status"):
+            queryset = queryset.filter(membership_status_code=status)
+        if term := self.request.query_params.get("q"):
+            queryset = queryset.search(term)
+        return queryset
+
+    @action(detail=False)
+    def export(self, request):
+        """The filtered clients as a streamed CSV file."""
+        return export_clients(self.filter_queryset(self.get_queryset()))
+
+
+class MembershipViewSet(CreateModelMixin, RetrieveModelMixin, ListModelMixin, GenericViewSet):
+    serializer_class = MembershipSerializer
+    queryset = Membership.objects.all()
+    permission_classes = [IsAdminUser]
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        queryset = self.queryset
+        if client := get_id_param(self.request, "client"):
+            queryset = queryset.filter(client=client)
+        if gym := get_id_param(self.request, "gym"):
+            queryset = queryset.filter(client__gym=gym)
+        return queryset
+
+
+class MembershipTypeViewSet(RetrieveModelMixin, ListModelMixin, GenericViewSet):
+    serializer_class = MembershipTypeSerializer
+    queryset = MembershipType.objects.all()
+    permission_classes = [IsAdminUser]
+    pagination_class = KeysetPagination
+
+    @action(detail=False, serializer_class=MembershipTypeStatisticsSerializer, pagination_class=None)
+    def statistics(self, request):
+        """Per-type members, sales and revenue for the optional start_date..end_date period, cached."""
+        period = StatisticsPeriodSerializer(data=request.query_params)
+        period.is_valid(raise_exception=True)
+        rows = membership_type_statistics(
+            period.validated_data.get("start_date"), period.validated_data.get("end_date")
+        )
+        return Response(self.get_serializer(rows, many=True).data)
+
+
+class TransactionViewSet(CreateModelMixin, RetrieveModelMixin, ListModelMixin, GenericViewSet):
+    serializer_class = TransactionSerializer
+    queryset = Transaction.objects.all()
+    permission_classes = [IsAdminUser]
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        queryset = self.queryset
+        if client := get_id_param(self.request, "client"):
+            queryset = queryset.filter(client=client)
+        if gym := get_id_param(self.request, "gym"):
+            queryset = queryset.filter(gym=gym)
+        return queryset
+
+    @action(detail=False)
+    def export(self, request):
+        """The filtered transactions as a streamed CSV file."""
+        return export_transactions(self.filter_queryset(self.get_queryset()))
@@ -0,0 +1,69 @@
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .instrumentation import record_cache_lookup
+
+# how long a worker may hold the recompute lock before others stop waiting for it
+LOCK_TIMEOUT = 60
+LOCK_POLL_INTERVAL = 0.1
+
+
+def _version_key(namespace):
+    return f"core:{namespace}:version"
+
+
+def get_version(namespace):
+    version = cache.get(_version_key(namespace))
+    if version is None:
+        cache.add(_version_key(namespace), 1, None)
+        version = cache.get(_version_key(namespace)) or 1
+    return version
+
+
+def invalidate(namespace):
+    """
+    Invalidate every value cached under ``namespace`` once the current transaction commits.
+
+    Bumping the namespace version after commit means a worker that recomputes concurrently
+    cannot store data read before the write under the new version.
+    """
+
+    def bump():
+        try:
+            cache.incr(_version_key(namespace))
+        except ValueError:
+            cache.add(_version_key(namespace), 1, None)
+
+    transaction.on_commit(bump)
+
+
+def get_or_compute(namespace, key, compute, timeout):
+    """
+    Return the cached value for ``key`` in ``namespace``, computing and caching it on a miss.
+
+    Concurrent misses are collapsed: the first worker takes a lock in the cache and computes the
+    value while the others poll for its result, and only compute it themselves if the lock expires.
+    """
+    key = f"core:{namespace}:{get_version(namespace)}:{key}"
+    lock_key = f"{key}:lock"
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    value = cache.get(key)
+    record_cache_lookup(hit=value is not None)
+    while True:
+        if value is not None:
+            return value
+        acquired = cache.add(lock_key, 1, LOCK_TIMEOUT)
+        # django-redis returns None instead of a bool when the cache is unreachable and
+        # IGNORE_EXCEPTIONS is on; don't wait for a lock nobody can hold
+        if acquired or acquired is None or time.monotonic() > deadline:
+            try:
+                value = compute()
+                cache.set(key, value, timeout)
+            finally:
+                if acquired:
+                    cache.delete(lock_key)
+            return value
+        time.sleep(LOCK_POLL_INTERVAL)
+        value = cache.get(key)
@@ -1,16 +1,71 @@
 # forms.py
 from django import forms
-from .models import Membership
-from django.utils.translation import gettext as _
+from django.core.validators import MaxLengthValidator
+from django.utils.translation import gettext_lazy as _
+
+from .models import Client, Membership, MembershipType, normalize_phone
+
+
+class PhoneNumberField(forms.CharField):
+    """
+    A phone number in any format, cleaned to its digits (see normalize_phone).
+
+    The length limit applies to the digits, so "+970 59-123-4567" fits in 15.
+    """
+
+    def __init__(self, *, max_digits=15, **kwargs):
+        super().__init__(**kwargs)
+        self.validators.append(
+            MaxLengthValidator(max_digits, message=_("Ensure this phone number has at most %(limit_value)d digits."))
+        )
+
+    def to_python(self, value):
+        return normalize_phone(super().to_python(value))
+
+
+class ClientForm(forms.ModelForm):
+    phone = PhoneNumberField(required=False, label=_("phone"))
+
+    class Meta:
+        model = Client
+        fields = "__all__"
 
 
 class MembershipForm(forms.ModelForm):
     add_income_transaction = forms.BooleanField(
-        required=False,
-        initial=True,
-        label=_("Add an income transaction for this new membership")
+        required=False, initial=True, label=_("Add an income transaction for this new membership")
     )
 
     class Meta:
         model = Membership
-        fields = '__all__'
+        fields = "__all__"
+
+
+class StatisticsPeriodForm(forms.Form):
+    start_date = forms.DateField(required=False, label=_("From"))
+    end_date = forms.DateField(required=False, label=_("To"))
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start_date, end_date = cleaned_data.get("start_date"), cleaned_data.get("end_date")
+        if start_date and end_date and start_date > end_date:
+            raise forms.ValidationError(_("The start date must be before the end date."))
+        return cleaned_data
+
+
+class RenewMembershipsForm(forms.Form):
+    membership_type = forms.ModelChoiceField(queryset=MembershipType.objects.all(), label=_("Membership type"))
+    add_income_transaction = forms.BooleanField(
+        required=False, initial=True, label=_("Add an income transaction for each new membership")
+    )
+
+
+class ImportForm(forms.Form):
+    KINDS = [
+        ("clients", _("Clients")),
+        ("memberships", _("Memberships")),
+        ("transactions", _("Transactions")),
+    ]
+
+    kind = forms.ChoiceField(choices=KINDS, label=_("Import"))
+    file = forms.FileField(label=_("CSV file"))
@@ -0,0 +1,287 @@
+import csv
+from collections import defaultdict
+from datetime import timedelta
+
+from django import forms
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils.translation import gettext as _
+
+from . import caching
+from .forms import PhoneNumberField
+from .models import Client, Gym, GymDailyTotal, Membership, MembershipType, Transaction, add_months, batched
+
+# rows validated and written per chunk
+IMPORT_BATCH_SIZE = 5000
+# errors kept in memory for display; every error still goes to the error callback
+MAX_REPORTED_ERRORS = 100
+DATE_INPUT_FORMATS = ["%Y-%m-%d", "%d-%m-%Y", "%d/%m/%Y"]
+
+
+def lookup_table(queryset, key="name"):
+    """Map the pk and the case-insensitive ``key`` of every object to its pk; ambiguous keys map to None."""
+    table = {}
+    for pk, value in queryset.values_list("pk", key):
+        table[str(pk)] = pk
+        value = value.strip().lower()
+        table[value] = None if value in table and table[value] != pk else pk
+    return table
+
+
+class Importer:
+    """
+    Import a CSV file row by row, in chunks of ``batch_size`` rows.
+
+    The file is read as a stream. Each chunk is validated row by row, its references resolved
+    with one query, and written with bulk_create in its own transaction, followed by set-based
+    updates of the data the signals would otherwise maintain. Invalid rows are skipped and
+    reported to ``on_error(line_number, row, message)`` instead of aborting the import.
+    """
+
+    # the form fields of the CSV columns, shared by every row rather than building a form per row
+    fields = {}
+
+    def __init__(self, batch_size=IMPORT_BATCH_SIZE, on_error=None):
+        self.batch_size = batch_size
+        self.on_error = on_error
+        self.created = 0
+        self.error_count = 0
+        self.errors = []
+
+    def run(self, file):
+        reader = csv.DictReader(file)
+        required = [name for name, field in self.fields.items() if field.required]
+        missing = [column for column in required if column not in (reader.fieldnames or [])]
+        if missing:
+            raise ValidationError(_("Missing columns: {0}.").format(", ".join(missing)))
+
+        try:
+            # the header is line 1
+            for chunk in batched(enumerate(reader, start=2), self.batch_size):
+                rows = []
+                for line, row in chunk:
+                    data, errors = self.validate(row)
+                    if errors:
+                        self.error(line, row, errors)
+                    else:
+                        rows.append((line, row, data))
+                rows = self.resolve(rows)
+                if rows:
+                    with transaction.atomic():
+                        self.write([data for line, row, data in rows])
+                    self.created += len(rows)
+        finally:
+            # also when reading the file fails after some chunks were written
+            caching.invalidate("gym-statistics")
+            caching.invalidate("membership-type-statistics")
+        return self
+
+    def validate(self, row):
+        data, errors = {}, {}
+        for name, field in self.fields.items():
+            try:
+                data[name] = field.clean(row.get(name))
+            except ValidationError as error:
+                errors[name] = error.messages
+        if not errors:
+            try:
+                self.clean(data)
+            except ValidationError as error:
+                errors = error.message_dict if hasattr(error, "error_dict") else {"__all__": error.messages}
+        return data, errors
+
+    def clean(self, data):
+        """Check the row's values against each other, raising ValidationError."""
+
+    def error(self, line, row, errors):
+        if isinstance(errors, dict):
+            message = "; ".join(
+                f"{field}: {' '.join(messages)}" if field != "__all__" else " ".join(messages)
+                for field, messages in errors.items()
+            )
+        else:
+            message = str(errors)
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+        if self.on_error:
+            self.on_error(line, row, message)
+
+    def resolve(self, rows):
+        """Replace the references in the chunk's rows by pks, reporting and dropping unresolved rows."""
+        return rows
+
+    def write(self, rows):
+        raise NotImplementedError
+
+
+class ClientImporter(Importer):
+    """Clients, each optionally with a first membership of an existing membership type."""
+
+    fields = {
+        "name": forms.CharField(max_length=100),
+        "phone": PhoneNumberField(required=False),
+        "gym": forms.CharField(),
+        "membership_type": forms.CharField(required=False),
+        "membership_start_date": forms.DateField(required=False, input_formats=DATE_INPUT_FORMATS),
+    }
+
+    def clean(self, data):
+        if data["membership_type"] and not data["membership_start_date"]:
+            raise ValidationError({"membership_start_date": _("Required with a membership type.")})
+
+    def run(self, file):
+        self.gyms = lookup_table(Gym.objects.all())
+        self.membership_types = MembershipType.objects.in_bulk()
+        self.membership_type_ids = lookup_table(MembershipType.objects.all())
+        return super().run(file)
+
+    def resolve(self, rows):
+        resolved = []
+        for line, row, data in rows:
+            gym = self.gyms.get(data["gym"].strip().lower())
+            membership_type = self.membership_type_ids.get(data["membership_type"].strip().lower())
+            if gym is None:
+                self.error(line, row, _("gym: Unknown or ambiguous gym “{0}”.").format(data["gym"]))
+            elif data["membership_type"] and membership_type is None:
+                self.error(
+                    line, row, _("membership_type: Unknown or ambiguous type “{0}”.").format(data["membership_type"])
+                )
+            else:
+                resolved.append((line, row, {**data, "gym": gym, "membership_type": membership_type}))
+        return resolved
+
+    def write(self, rows):
+        clients = Client.objects.bulk_create(
+            Client(name=data["name"], phone=data["phone"], gym_id=data["gym"]) for data in rows
+        )
+        memberships = []
+        for client, data in zip(clients, rows):
+            if data["membership_type"]:
+                membership_type = self.membership_types[data["membership_type"]]
+                start_date = data["membership_start_date"]
+                memberships.append(
+                    Membership(
+                        client=client,
+                        membership_type=membership_type,
+                        start_date=start_date,
+                        end_date=add_months(start_date, membership_type.duration_months) - timedelta(days=1),
+                    )
+                )
+        if memberships:
+            Membership.objects.bulk_create(memberships)
+            Client.objects.filter(pk__in=[m.client_id for m in memberships]).refresh_membership_summary()
+
+
+class MembershipImporter(Importer):
+    """Memberships of existing clients; the end date defaults to the membership type's duration."""
+
+    fields = {
+        "client": forms.IntegerField(),
+        "membership_type": forms.CharField(),
+        "start_date": forms.DateField(input_formats=DATE_INPUT_FORMATS),
+        "end_date": forms.DateField(required=False, input_formats=DATE_INPUT_FORMATS),
+    }
+
+    def clean(self, data):
+        if data["end_date"] and data["start_date"] > data["end_date"]:
+            raise ValidationError(_("The start date must be before the end date."))
+
+    def run(self, file):
+        self.membership_types = MembershipType.objects.in_bulk()
+        self.membership_type_ids = lookup_table(MembershipType.objects.all())
+        return super().run(file)
+
+    def resolve(self, rows):
+        existing = set(
+            Client.objects.filter(pk__in=[data["client"] for line, row, data in rows]).values_list("pk", flat=True)
+        )
+        resolved = []
+        for line, row, data in rows:
+            membership_type = self.membership_type_ids.get(data["membership_type"].strip().lower())
+            if data["client"] not in existing:
+                self.error(line, row, _("client: No client with id {0}.").format(data["client"]))
+            elif membership_type is None:
+                self.error(
+                    line, row, _("membership_type: Unknown or ambiguous type “{0}”.").format(data["membership_type"])
+                )
+            else:
+                resolved.append((line, row, {**data, "membership_type": self.membership_types[membership_type]}))
+        return resolved
+
+    def write(self, rows):
+        Membership.objects.bulk_create(
+            Membership(
+                client_id=data["client"],
+                membership_type=data["membership_type"],
+                start_date=data["start_date"],
+                end_date=data["end_date"]
+                or add_months(data["start_date"], data["membership_type"].duration_months) - timedelta(days=1),
+            )
+            for data in rows
+        )
+        Client.objects.filter(pk__in={data["client"] for data in rows}).refresh_membership_summary()
+
+
+class TransactionImporter(Importer):
+    """Transactions of an existing client, or expenses and income of a gym without a client."""
+
+    fields = {
+        "client": forms.IntegerField(required=False),
+        "gym": forms.CharField(required=False),
+        "transaction_type": forms.ChoiceField(choices=Transaction.TRANSACTION_TYPES),
+        "amount": forms.DecimalField(max_digits=10, decimal_places=2, min_value=0),
+        "date": forms.DateField(input_formats=DATE_INPUT_FORMATS),
+        "description": forms.CharField(required=False),
+    }
+
+    def run(self, file):
+        self.gyms = lookup_table(Gym.objects.all())
+        return super().run(file)
+
+    def resolve(self, rows):
+        self.client_gyms = dict(
+            Client.objects.filter(pk__in=[data["client"] for line, row, data in rows if data["client"]]).values_list(
+                "pk", "gym_id"
+            )
+        )
+        resolved = []
+        for line, row, data in rows:
+            # a client's transactions belong to the client's gym; the gym column is for the others
+            gym = self.gyms.get(data["gym"].strip().lower()) if data["gym"] else None
+            if data["client"] and data["client"] not in self.client_gyms:
+                self.error(line, row, _("client: No client with id {0}.").format(data["client"]))
+            elif not data["client"] and data["gym"] and gym is None:
+                self.error(line, row, _("gym: Unknown or ambiguous gym “{0}”.").format(data["gym"]))
+            else:
+                gym = self.client_gyms[data["client"]] if data["client"] else gym
+                resolved.append((line, row, {**data, "gym": gym}))
+        return resolved
+
+    def write(self, rows):
+        Transaction.objects.bulk_create(
+            Transaction(
+                client_id=data["client"],
+                gym_id=data["gym"],
+                transaction_type=data["transaction_type"],
+                amount=data["amount"],
+                date=data["date"],
+                description=data["description"],
+            )
+            for data in rows
+        )
+        daily_totals = defaultdict(lambda: [0, 0])
+        for data in rows:
+            if data["gym"]:
+                total = daily_totals[data["gym"], data["date"], data["transaction_type"]]
+                total[0] += data["amount"]
+                total[1] += 1
+        Client.objects.filter(pk__in={data["client"] for data in rows if data["client"]}).refresh_balances()
+        GymDailyTotal.objects.add_many(key + tuple(total) for key, total in daily_totals.items())
+
+
+IMPORTERS = {
+    "clients": ClientImporter,
+    "memberships": MembershipImporter,
+    "transactions": TransactionImporter,
+}
@@ -0,0 +1,177 @@
+import json
+import statistics
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from gym_management_system.core.models import Client, Gym, MembershipType
+
+# number of clients and gyms each benchmark samples, so timings are comparable across scales
+SAMPLE_SIZE = 50
+
+
+def client_membership_status(clients, gyms, membership_types):
+    for client in clients:
+        client.membership_status()
+
+
+def client_balance(clients, gyms, membership_types):
+    for client in clients:
+        client.balance()
+
+
+def gym_total_income(clients, gyms, membership_types):
+    for gym in gyms:
+        gym.total_income()
+
+
+def gym_balance(clients, gyms, membership_types):
+    for gym in gyms:
+        gym.balance()
+
+
+def membership_type_num_clients(clients, gyms, membership_types):
+    for membership_type in membership_types:
+        membership_type.num_clients()
+
+
+def statistics_query(clients, gyms, membership_types):
+    # the query behind the statistics view, without its cache
+    end_date = timezone.now().date()
+    list(Gym.objects.with_financials(end_date - timedelta(days=365), end_date).values())
+
+
+BENCHMARKS = [
+    client_membership_status,
+    client_balance,
+    gym_total_income,
+    gym_balance,
+    membership_type_num_clients,
+    statistics_query,
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the core model methods and record their latency and query counts as JSON, "
+        "optionally comparing them with a baseline from an earlier run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scale",
+            type=int,
+            action="append",
+            dest="scales",
+            help=(
+                "Number of transactions of a generated dataset to benchmark (repeatable, e.g. 1000, 100000, "
+                "1000000). Deletes all core data first. Without it the current data is benchmarked."
+            ),
+        )
+        parser.add_argument("--repeat", type=int, default=5, help="Runs per benchmark; the median is reported.")
+        parser.add_argument("--seed", type=int, default=0, help="Seed of the generated datasets.")
+        parser.add_argument("--output", type=Path, default=Path("benchmark-results.json"))
+        parser.add_argument("--baseline", type=Path, help="Results file of an earlier run to compare with.")
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.2,
+            help="Allowed relative slowdown against the baseline before a benchmark counts as a regression.",
+        )
+        parser.add_argument(
+            "--noinput",
+            "--no-input",
+            action="store_false",
+            dest="interactive",
+            help="Do not ask before deleting the core data for --scale.",
+        )
+
+    def handle(self, *args, scales, repeat, seed, output, baseline, tolerance, interactive, **options):
+        if scales and connection.vendor != "postgresql":
+            raise CommandError("--scale requires PostgreSQL.")
+        if scales and interactive:
+            answer = input("--scale deletes every gym, client, membership and transaction. Type 'yes' to continue: ")
+            if answer != "yes":
+                raise CommandError("Benchmark cancelled.")
+
+        results = {}
+        for scale in scales or [None]:
+            if scale is not None:
+                self.load_dataset(scale, seed)
+            label = str(scale) if scale is not None else "current"
+            results[label] = self.run(repeat)
+
+        output.write_text(json.dumps({"created": timezone.now().isoformat(), "results": results}, indent=2))
+        self.stdout.write(f"Wrote {output}.")
+
+        if baseline:
+            regressions = self.compare(json.loads(baseline.read_text())["results"], results, tolerance)
+            if regressions:
+                raise CommandError(f"{len(regressions)} benchmarks regressed: {', '.join(regressions)}")
+
+    def load_dataset(self, scale, seed):
+        self.stdout.write(f"Generating a dataset of {scale} transactions...")
+        with connection.cursor() as cursor:
+            # TRUNCATE rather than delete(), which would send signals for every row
+            cursor.execute("TRUNCATE core_gym, core_client, core_membershiptype CASCADE")
+        call_command(
+            "generate_dataset",
+            "--gyms=20",
+            f"--clients={max(scale // 20, 1)}",
+            f"--transactions={scale}",
+            f"--seed={seed}",
+            "--copy",
+            stdout=self.stdout,
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def run(self, repeat):
+        step = max(Client.objects.count() // SAMPLE_SIZE, 1)
+        client_pks = list(Client.objects.order_by("pk").values_list("pk", flat=True)[::step][:SAMPLE_SIZE])
+        results = {}
+        for benchmark in BENCHMARKS:
+            timings, queries = [], 0
+            for _ in range(repeat):
+                # fresh instances every run, so nothing is served from a previous run's attributes
+                args = (
+                    list(Client.objects.filter(pk__in=client_pks)),
+                    list(Gym.objects.all()[:SAMPLE_SIZE]),
+                    list(MembershipType.objects.all()),
+                )
+                with CaptureQueriesContext(connection) as context:
+                    start = time.perf_counter()
+                    benchmark(*args)
+                    timings.append((time.perf_counter() - start) * 1000)
+                queries = len(context)
+            results[benchmark.__name__] = {
+                "median_ms": round(statistics.median(timings), 3),
+                "min_ms": round(min(timings), 3),
+                "queries": queries,
+            }
+            self.stdout.write(f"  {benchmark.__name__}: {results[benchmark.__name__]}")
+        return results
+
+    def compare(self, baseline, results, tolerance):
+        regressions = []
+        for label, benchmarks in results.items():
+            for name, result in benchmarks.items():
+                previous = baseline.get(label, {}).get(name)
+                if previous is None:
+                    continue
+                ratio = result["median_ms"] / previous["median_ms"] if previous["median_ms"] else 1
+                regressed = ratio > 1 + tolerance or result["queries"] > previous["queries"]
+                if regressed:
+                    regressions.append(f"{label}/{name}")
+                self.stdout.write(
+                    f"{label}/{name}: {previous['median_ms']} -> {result['median_ms']} ms ({ratio:.2f}x), "
+                    f"{previous['queries']} -> {result['queries']} queries"
+                    + (self.style.ERROR(" REGRESSION") if regressed else "")
+                )
+        return regressions
@@ -0,0 +1,56 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils import timezone
+
+from gym_management_system.core import partitions
+from gym_management_system.core.models import add_months
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the transaction table's partitions of the coming periods (months or years, see "
+        "TRANSACTION_PARTITION_INTERVAL) ahead of time. Meant to run monthly; periods that already "
+        "have a partition are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--months",
+            type=int,
+            default=partitions.MONTHS_AHEAD,
+            help="Create the partitions up to this many months ahead.",
+        )
+        parser.add_argument(
+            "--start",
+            type=date.fromisoformat,
+            default=None,
+            help="Also create the partitions of the past periods since this date (YYYY-MM-DD), e.g. before "
+            "importing older transactions.",
+        )
+        parser.add_argument(
+            "--date",
+            type=date.fromisoformat,
+            default=None,
+            help="Treat this date (YYYY-MM-DD) as today.",
+        )
+        parser.add_argument("--database", default="default", help="The database to create the partitions in.")
+
+    def handle(self, *args, **options):
+        connection = connections[options["database"]]
+        today = options["date"] or timezone.now().date()
+        start = min(options["start"] or today, today)
+        created = partitions.create_partitions(
+            connection, start, add_months(today, options["months"]) - timedelta(days=1)
+        )
+        for name in created:
+            self.stdout.write(f"Created {name}.")
+        self.stdout.write(self.style.SUCCESS(f"Created {len(created)} partitions."))
+        if stray := partitions.count_default_rows(connection):
+            self.stderr.write(
+                self.style.WARNING(
+                    f"{stray} transactions are dated outside every partition and stored in "
+                    f"{partitions.DEFAULT_PARTITION}; use --start to give their periods partitions."
+                )
+            )
@@ -0,0 +1,202 @@
+import csv
+import io
+import random
+from datetime import date, timedelta
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from gym_management_system.core import partitions
+from gym_management_system.core.models import Client, Gym, Membership, MembershipType, Transaction, batched
+
+FIRST_NAMES = (
+    "Ahmad Mohammad Omar Yousef Ali Khaled Hasan Ibrahim Sami Tariq "
+    "Lina Sara Rana Maya Noor Huda Dana Layla Reem Salma"
+).split()
+LAST_NAMES = (
+    "Abuomar Khalil Haddad Nasser Saleh Masri Qasem Awad Darwish Hamdan "
+    "Jaber Shaheen Odeh Yasin Barghouti Zaid Hijazi Suleiman Taha Issa"
+).split()
+MEMBERSHIP_TYPES = [
+    # name, duration in months, price, relative popularity
+    ("Monthly", 1, 150, 6),
+    ("Quarterly", 3, 400, 3),
+    ("Half year", 6, 750, 2),
+    ("Yearly", 12, 1400, 1),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with a synthetic, production-sized dataset of gyms, clients, memberships "
+        "and transactions. The same --seed and --end-date always produce the same data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--gyms", type=int, default=20)
+        parser.add_argument("--clients", type=int, default=10000)
+        parser.add_argument(
+            "--transactions",
+            type=int,
+            default=200000,
+            help="Total number of transactions, membership payments included.",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--years", type=int, default=3, help="Length of the generated history.")
+        parser.add_argument(
+            "--end-date",
+            type=date.fromisoformat,
+            default=None,
+            help="Last day of the generated history (YYYY-MM-DD), today by default.",
+        )
+        parser.add_argument(
+            "--renewal-rate",
+            type=float,
+            default=0.7,
+            help="Probability that a membership is renewed the day after it ends.",
+        )
+        parser.add_argument(
+            "--return-rate",
+            type=float,
+            default=0.3,
+            help="Probability that a client who did not renew comes back after a break.",
+        )
+        parser.add_argument(
+            "--expense-ratio",
+            type=float,
+            default=0.2,
+            help="Share of expenses among the transactions that are not membership payments.",
+        )
+        parser.add_argument("--batch-size", type=int, default=5000, help="Rows per INSERT (or COPY) statement.")
+        parser.add_argument(
+            "--copy",
+            action="store_true",
+            help="Load memberships and transactions with PostgreSQL COPY instead of bulk_create.",
+        )
+
+    def handle(self, *args, **options):
+        if options["copy"] and connection.vendor != "postgresql":
+            raise CommandError("--copy requires PostgreSQL.")
+        self.options = options
+        self.rng = random.Random(options["seed"])
+        self.end_date = options["end_date"] or timezone.now().date()
+        self.start_date = self.end_date - timedelta(days=365 * options["years"])
+        self.batch_size = options["batch_size"]
+        # the history goes into partitions of its own rather than the default partition
+        partitions.create_partitions(connection, self.start_date, self.end_date)
+
+        gyms = self.create_gyms()
+        membership_types = self.create_membership_types()
+        payments = 0
+        client_gyms = []
+        # larger gyms first: the client share of gym k falls off as 1 / (k + 1)
+        gym_weights = [1 / (k + 1) for k in range(len(gyms))]
+        for batch in batched(range(options["clients"]), self.batch_size):
+            clients = Client.objects.bulk_create(self.build_client(gyms, gym_weights) for _ in batch)
+            client_gyms.extend((client.pk, client.gym_id) for client in clients)
+            payments += self.create_memberships(clients, membership_types)
+        self.stdout.write(f"Created {len(client_gyms)} clients with {payments} membership payments.")
+
+        other = max(options["transactions"] - payments, 0)
+        self.create_other_transactions(client_gyms, other)
+        self.stdout.write(f"Created {other} other transactions.")
+
+        # bulk inserts skip the signals that maintain the denormalized data
+        call_command("update_membership_states", "--backfill", stdout=self.stdout)
+        call_command("rebuild_client_balances", stdout=self.stdout)
+        call_command("rebuild_daily_totals", stdout=self.stdout)
+
+    def create_gyms(self):
+        return Gym.objects.bulk_create(
+            Gym(name=f"Gym {i + 1}", address=f"{self.rng.randint(1, 200)} Main Street")
+            for i in range(self.options["gyms"])
+        )
+
+    def create_membership_types(self):
+        return [
+            (MembershipType.objects.create(name=name, duration_months=months, price=price), weight)
+            for name, months, price, weight in MEMBERSHIP_TYPES
+        ]
+
+    def build_client(self, gyms, gym_weights):
+        name = f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}"
+        phone = f"059{self.rng.randrange(10**7):07d}"
+        gym = self.rng.choices(gyms, weights=gym_weights)[0]
+        return Client(name=name, phone=phone, gym=gym)
+
+    def create_memberships(self, clients, membership_types):
+        """Give each client a history of memberships, each paid for with an income transaction."""
+        types, weights = zip(*membership_types)
+        memberships, payments = [], []
+        span = (self.end_date - self.start_date).days
+        for client in clients:
+            start = self.start_date + timedelta(days=self.rng.randrange(span))
+            while start <= self.end_date:
+                membership_type = self.rng.choices(types, weights=weights)[0]
+                end = start + timedelta(days=30 * membership_type.duration_months - 1)
+                memberships.append(
+                    Membership(client=client, membership_type=membership_type, start_date=start, end_date=end)
+                )
+                payments.append(
+                    Transaction(
+                        client=client,
+                        gym_id=client.gym_id,
+                        transaction_type="income",
+                        amount=membership_type.price,
+                        date=start,
+                        description=f"Income for {membership_type} membership of {client}",
+                    )
+                )
+                if self.rng.random() < self.options["renewal_rate"]:
+                    start = end + timedelta(days=1)
+                elif self.rng.random() < self.options["return_rate"]:
+                    start = end + timedelta(days=self.rng.randint(30, 180))
+                else:
+                    break
+        self.insert(Membership, memberships)
+        self.insert(Transaction, payments)
+        return len(payments)
+
+    def create_other_transactions(self, client_gyms, count):
+        span = (self.end_date - self.start_date).days + 1
+        expense_ratio = self.options["expense_ratio"]
+        for batch in batched(range(count), self.batch_size):
+            transactions = []
+            for _ in batch:
+                expense = self.rng.random() < expense_ratio
+                client_id, gym_id = self.rng.choice(client_gyms)
+                transactions.append(
+                    Transaction(
+                        client_id=client_id,
+                        gym_id=gym_id,
+                        transaction_type="expense" if expense else "income",
+                        amount=self.rng.randint(5, 300),
+                        date=self.start_date + timedelta(days=self.rng.randrange(span)),
+                        description="Refund" if expense else "Shop purchase",
+                    )
+                )
+            self.insert(Transaction, transactions)
+
+    def insert(self, model, objs):
+        for batch in batched(objs, self.batch_size):
+            if self.options["copy"]:
+                self.copy(model, batch)
+            else:
+                model.objects.bulk_create(batch)
+
+    def copy(self, model, objs):
+        fields = [field for field in model._meta.concrete_fields if not field.primary_key]
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for obj in objs:
+            # csv writes None as an empty unquoted field, which COPY reads as NULL
+            writer.writerow(field.get_db_prep_value(getattr(obj, field.attname), connection) for field in fields)
+        buffer.seek(0)
+        columns = ", ".join(connection.ops.quote_name(field.column) for field in fields)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {connection.ops.quote_name(model._meta.db_table)} ({columns}) FROM STDIN WITH (FORMAT csv)",
+                buffer,
+            )
@@ -0,0 +1,55 @@
+import csv
+from pathlib import Path
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from gym_management_system.core.imports import IMPORT_BATCH_SIZE, IMPORTERS
+
+
+class Command(BaseCommand):
+    help = (
+        "Import clients, memberships or transactions from a CSV file, in chunks. Invalid rows are skipped "
+        "and reported instead of aborting the import."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=list(IMPORTERS))
+        parser.add_argument("path", type=Path)
+        parser.add_argument(
+            "--batch-size", type=int, default=IMPORT_BATCH_SIZE, help="Rows validated and written per transaction."
+        )
+        parser.add_argument(
+            "--error-report",
+            type=Path,
+            help="Write the skipped rows with their line number and errors to this CSV file instead of stderr.",
+        )
+
+    def handle(self, *args, kind, path, batch_size, error_report, **options):
+        report_file = error_report.open("w", newline="") if error_report else None
+        report = csv.writer(report_file) if report_file else None
+        header_written = False
+
+        def on_error(line, row, message):
+            nonlocal header_written
+            if report is None:
+                self.stderr.write(f"Line {line}: {message}")
+                return
+            if not header_written:
+                report.writerow(["line", "errors", *row])
+                header_written = True
+            report.writerow([line, message, *row.values()])
+
+        importer = IMPORTERS[kind](batch_size=batch_size, on_error=on_error)
+        try:
+            with path.open(encoding="utf-8-sig", newline="") as file:
+                importer.run(file)
+        except ValidationError as error:
+            raise CommandError(" ".join(error.messages))
+        finally:
+            if report_file:
+                report_file.close()
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Imported {importer.created} {kind}, skipped {importer.error_count} invalid rows.")
+        )
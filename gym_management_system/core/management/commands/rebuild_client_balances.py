@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from gym_management_system.core.models import Client
+
+
+class Command(BaseCommand):
+    help = "Recompute every client's stored income, expense and balance totals from the transactions."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10000,
+            help="Number of clients updated per transaction.",
+        )
+
+    def handle(self, *args, batch_size, **options):
+        updated = 0
+        last_pk = 0
+        while True:
+            pks = list(Client.objects.filter(pk__gt=last_pk).order_by("pk").values_list("pk", flat=True)[:batch_size])
+            if not pks:
+                break
+            with transaction.atomic():
+                updated += Client.objects.filter(pk__gte=pks[0], pk__lte=pks[-1]).refresh_balances()
+            last_pk = pks[-1]
+        self.stdout.write(self.style.SUCCESS(f"Updated the balance of {updated} clients."))
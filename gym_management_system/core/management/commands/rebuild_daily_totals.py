@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from gym_management_system.core.models import GymDailyTotal
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-gym daily income and expense totals from the transactions."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--gym", type=int, action="append", dest="gyms", help="Only rebuild this gym id (repeatable)."
+        )
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows inserted per INSERT statement.")
+
+    def handle(self, *args, gyms, batch_size, **options):
+        created = GymDailyTotal.objects.rebuild(gyms=gyms, batch_size=batch_size)
+        self.stdout.write(self.style.SUCCESS(f"Created {created} daily totals."))
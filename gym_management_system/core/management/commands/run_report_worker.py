@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from gym_management_system.core.reports import claim_next_job, run_job
+
+
+class Command(BaseCommand):
+    help = "Produce the reports requested in the admin, one job at a time, outside the web workers."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--poll-interval", type=float, default=5, help="Seconds to wait before checking an empty queue again."
+        )
+        parser.add_argument("--once", action="store_true", help="Exit when the queue is empty instead of waiting.")
+
+    def handle(self, *args, poll_interval, once, **options):
+        while True:
+            # drop connections the database has closed while the worker was idle
+            close_old_connections()
+            job = claim_next_job()
+            if job is None:
+                if once:
+                    return
+                time.sleep(poll_interval)
+                continue
+            self.stdout.write(f"Running {job}...")
+            run_job(job)
+            if job.status == "done":
+                self.stdout.write(self.style.SUCCESS(f"{job} done: {job.output.name}"))
+            else:
+                self.stderr.write(f"{job} failed:\n{job.error}")
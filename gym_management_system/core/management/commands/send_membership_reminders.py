@@ -0,0 +1,37 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from gym_management_system.core.models import EXPIRING_SOON_DAYS
+from gym_management_system.core.reminders import REMINDER_BATCH_SIZE, get_backend, send_expiring_reminders
+
+
+class Command(BaseCommand):
+    help = (
+        "Remind the clients whose membership ends within the next few days, once per membership. "
+        "Meant to run daily from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=EXPIRING_SOON_DAYS,
+            help="Remind clients whose membership ends within this many days.",
+        )
+        parser.add_argument(
+            "--date",
+            type=date.fromisoformat,
+            default=None,
+            help="Day to run for (YYYY-MM-DD), today by default.",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=REMINDER_BATCH_SIZE, help="Reminders handed to the backend at once."
+        )
+        parser.add_argument(
+            "--backend", help="Dotted path of the reminder backend, settings.MEMBERSHIP_REMINDER_BACKEND by default."
+        )
+
+    def handle(self, *args, days, date, batch_size, backend, **options):
+        sent = send_expiring_reminders(days, date, get_backend(backend), batch_size)
+        self.stdout.write(self.style.SUCCESS(f"Sent {sent} membership reminders."))
@@ -0,0 +1,50 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from gym_management_system.core.models import Client
+
+
+class Command(BaseCommand):
+    help = (
+        "Move clients whose stored membership state is due to change (active -> expiring soon -> expired). "
+        "Meant to run nightly; use --backfill to rebuild every client's membership summary."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--backfill",
+            action="store_true",
+            help="Recompute the membership summary of every client from its memberships.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10000,
+            help="Number of clients updated per transaction in --backfill mode.",
+        )
+        parser.add_argument(
+            "--date",
+            type=date.fromisoformat,
+            default=None,
+            help="Treat this date (YYYY-MM-DD) as today.",
+        )
+
+    def handle(self, *args, backfill, batch_size, date, **options):
+        if backfill:
+            updated = self.backfill(batch_size, date)
+        else:
+            updated = Client.objects.sweep_membership_states(today=date)
+        self.stdout.write(self.style.SUCCESS(f"Updated the membership state of {updated} clients."))
+
+    def backfill(self, batch_size, today):
+        updated = 0
+        last_pk = 0
+        while True:
+            pks = list(Client.objects.filter(pk__gt=last_pk).order_by("pk").values_list("pk", flat=True)[:batch_size])
+            if not pks:
+                return updated
+            with transaction.atomic():
+                updated += Client.objects.filter(pk__gte=pks[0], pk__lte=pks[-1]).refresh_membership_summary(today)
+            last_pk = pks[-1]
@@ -0,0 +1,52 @@
+import os
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram
+from prometheus_client.multiprocess import MultiProcessCollector
+
+# With PROMETHEUS_MULTIPROC_DIR set (see compose/production/django/start), every gunicorn worker
+# writes its samples to files in that directory and the scrape sums them across workers.
+REQUEST_LATENCY = Histogram(
+    "gym_request_duration_seconds",
+    "Time to produce a response, by resolved view.",
+    ["view", "method"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+REQUEST_QUERIES = Histogram(
+    "gym_request_db_queries",
+    "Database queries per request, by resolved view.",
+    ["view"],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200, 500),
+)
+CACHE_LOOKUPS = Counter(
+    "gym_cache_lookups",
+    "Lookups of cached values; the hit ratio is the rate of result=hit over the rate of all lookups.",
+    ["result"],
+)
+WORKER_REQUESTS = Gauge(
+    "gym_worker_requests",
+    "Requests served by each live web worker process since it started.",
+    multiprocess_mode="liveall",
+)
+
+
+def observe_request(view, method, duration, queries):
+    REQUEST_LATENCY.labels(view, method).observe(duration)
+    REQUEST_QUERIES.labels(view).observe(queries)
+    WORKER_REQUESTS.inc()
+
+
+def observe_cache_lookup(hit):
+    CACHE_LOOKUPS.labels("hit" if hit else "miss").inc()
+
+
+def get_registry(*collectors):
+    """A registry of the request metrics, summed across the worker processes if there are several."""
+    registry = CollectorRegistry()
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        MultiProcessCollector(registry)
+    else:
+        for metric in (REQUEST_LATENCY, REQUEST_QUERIES, CACHE_LOOKUPS, WORKER_REQUESTS):
+            registry.register(metric)
+    for collector in collectors:
+        registry.register(collector)
+    return registry
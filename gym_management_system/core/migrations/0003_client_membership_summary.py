@@ -0,0 +1,81 @@
+# Generated by Django 4.1.8 on 2026-10-18 06:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0002_alter_client_name_alter_client_phone_and_more"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="client",
+            options={"verbose_name": "client", "verbose_name_plural": "clients"},
+        ),
+        migrations.AlterModelOptions(
+            name="gym",
+            options={"verbose_name": "gym", "verbose_name_plural": "gyms"},
+        ),
+        migrations.AlterModelOptions(
+            name="membership",
+            options={"verbose_name": "membership", "verbose_name_plural": "memberships"},
+        ),
+        migrations.AlterModelOptions(
+            name="membershiptype",
+            options={"verbose_name": "membership type", "verbose_name_plural": "membership types"},
+        ),
+        migrations.AlterModelOptions(
+            name="transaction",
+            options={"verbose_name": "transaction", "verbose_name_plural": "transactions"},
+        ),
+        migrations.AddField(
+            model_name="client",
+            name="membership_end_date",
+            field=models.DateField(db_index=True, editable=False, null=True, verbose_name="membership end date"),
+        ),
+        migrations.AddField(
+            model_name="client",
+            name="membership_state",
+            field=models.CharField(
+                choices=[
+                    ("no_membership", "no_membership"),
+                    ("expired", "expired"),
+                    ("expiring_soon", "expiring_soon"),
+                    ("active", "active"),
+                ],
+                db_index=True,
+                default="no_membership",
+                editable=False,
+                max_length=20,
+                verbose_name="membership state",
+            ),
+        ),
+        migrations.AddField(
+            model_name="client",
+            name="membership_state_changes_on",
+            field=models.DateField(
+                db_index=True, editable=False, null=True, verbose_name="membership state changes on"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="client",
+            name="gym",
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to="core.gym", verbose_name="gym"),
+        ),
+        migrations.AlterField(
+            model_name="membership",
+            name="client",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE, to="core.client", verbose_name="client"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="membership",
+            name="membership_type",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE, to="core.membershiptype", verbose_name="membership type"
+            ),
+        ),
+    ]
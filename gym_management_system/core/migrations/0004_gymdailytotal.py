@@ -0,0 +1,69 @@
+# Generated by Django 4.1.8 on 2026-10-18 06:39
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def build_daily_totals(apps, schema_editor):
+    Transaction = apps.get_model("core", "Transaction")
+    GymDailyTotal = apps.get_model("core", "GymDailyTotal")
+    rows = (
+        Transaction.objects.filter(client__isnull=False)
+        .order_by()
+        .values("client__gym", "date", "transaction_type")
+        .annotate(total=models.Sum("amount"), count=models.Count("pk"))
+    )
+    GymDailyTotal.objects.bulk_create(
+        (
+            GymDailyTotal(
+                gym_id=row["client__gym"],
+                date=row["date"],
+                transaction_type=row["transaction_type"],
+                total=row["total"],
+                count=row["count"],
+            )
+            for row in rows.iterator(chunk_size=1000)
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0003_client_membership_summary"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="GymDailyTotal",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("date", models.DateField(verbose_name="date")),
+                (
+                    "transaction_type",
+                    models.CharField(
+                        choices=[("income", "Income"), ("expense", "Expense")],
+                        max_length=10,
+                        verbose_name="transaction type",
+                    ),
+                ),
+                ("total", models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name="total")),
+                ("count", models.PositiveIntegerField(default=0, verbose_name="count")),
+                (
+                    "gym",
+                    models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to="core.gym", verbose_name="gym"),
+                ),
+            ],
+            options={
+                "verbose_name": "gym daily total",
+                "verbose_name_plural": "gym daily totals",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="gymdailytotal",
+            constraint=models.UniqueConstraint(
+                fields=("gym", "date", "transaction_type"), name="unique_gym_daily_total"
+            ),
+        ),
+        migrations.RunPython(build_daily_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 4.1.8 on 2026-10-18 06:40
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def compute_balances(apps, schema_editor):
+    Client = apps.get_model("core", "Client")
+    Transaction = apps.get_model("core", "Transaction")
+
+    def total(transaction_type):
+        totals = (
+            Transaction.objects.filter(client=models.OuterRef("pk"), transaction_type=transaction_type)
+            .order_by()
+            .values("client")
+            .annotate(total=models.Sum("amount"))
+            .values("total")
+        )
+        return Coalesce(models.Subquery(totals), models.Value(0), output_field=models.DecimalField())
+
+    Client.objects.update(
+        income_total=total("income"),
+        expenses_total=total("expense"),
+        current_balance=total("income") - total("expense"),
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0004_gymdailytotal"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="client",
+            name="current_balance",
+            field=models.DecimalField(
+                db_index=True, decimal_places=2, default=0, editable=False, max_digits=14, verbose_name="balance"
+            ),
+        ),
+        migrations.AddField(
+            model_name="client",
+            name="expenses_total",
+            field=models.DecimalField(
+                decimal_places=2, default=0, editable=False, max_digits=14, verbose_name="total expenses"
+            ),
+        ),
+        migrations.AddField(
+            model_name="client",
+            name="income_total",
+            field=models.DecimalField(
+                decimal_places=2, default=0, editable=False, max_digits=14, verbose_name="total income"
+            ),
+        ),
+        migrations.RunPython(compute_balances, migrations.RunPython.noop),
+    ]
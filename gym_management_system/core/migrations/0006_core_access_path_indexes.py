@@ -0,0 +1,36 @@
+# Generated by Django 4.1.8 on 2026-10-18 06:41
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # build the indexes without locking writes to the (large) tables
+    atomic = False
+
+    dependencies = [
+        ("core", "0005_client_balance"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="membership",
+            index=models.Index(fields=["client", "end_date"], name="membership_client_end_idx"),
+        ),
+        AddIndexConcurrently(
+            model_name="membership",
+            index=models.Index(fields=["end_date"], include=("client",), name="membership_end_idx"),
+        ),
+        AddIndexConcurrently(
+            model_name="transaction",
+            index=models.Index(
+                fields=["client", "transaction_type"], include=("amount",), name="transaction_client_type_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="transaction",
+            index=models.Index(
+                fields=["date", "transaction_type"], include=("amount",), name="transaction_date_type_idx"
+            ),
+        ),
+    ]
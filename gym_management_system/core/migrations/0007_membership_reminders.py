@@ -0,0 +1,46 @@
+# Generated by Django 4.1.8 on 2026-10-18 07:02
+
+import django.db.models.deletion
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # build the client index without locking writes to the table
+    atomic = False
+
+    dependencies = [
+        ("core", "0006_core_access_path_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MembershipReminder",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("membership_end_date", models.DateField(verbose_name="membership end date")),
+                ("sent_at", models.DateTimeField(auto_now_add=True, verbose_name="sent at")),
+            ],
+            options={
+                "verbose_name": "membership reminder",
+                "verbose_name_plural": "membership reminders",
+            },
+        ),
+        AddIndexConcurrently(
+            model_name="client",
+            index=models.Index(fields=["gym", "membership_end_date"], name="client_gym_end_date_idx"),
+        ),
+        migrations.AddField(
+            model_name="membershipreminder",
+            name="client",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE, to="core.client", verbose_name="client"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="membershipreminder",
+            constraint=models.UniqueConstraint(
+                fields=("client", "membership_end_date"), name="unique_membership_reminder"
+            ),
+        ),
+    ]
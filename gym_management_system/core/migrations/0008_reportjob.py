@@ -0,0 +1,87 @@
+# Generated by Django 4.1.8 on 2026-10-18 07:06
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("core", "0007_membership_reminders"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ReportJob",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("gym_pnl", "Monthly profit and loss per gym"),
+                            ("transaction_history", "Transaction history"),
+                        ],
+                        max_length=30,
+                        verbose_name="report",
+                    ),
+                ),
+                ("start_date", models.DateField(blank=True, null=True, verbose_name="start date")),
+                ("end_date", models.DateField(blank=True, null=True, verbose_name="end date")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("running", "Running"),
+                            ("done", "Done"),
+                            ("failed", "Failed"),
+                        ],
+                        default="pending",
+                        editable=False,
+                        max_length=10,
+                        verbose_name="status",
+                    ),
+                ),
+                ("progress", models.PositiveSmallIntegerField(default=0, editable=False, verbose_name="progress")),
+                (
+                    "output",
+                    models.FileField(blank=True, editable=False, upload_to="reports/%Y/%m/", verbose_name="output"),
+                ),
+                ("error", models.TextField(blank=True, editable=False, verbose_name="error")),
+                ("created_at", models.DateTimeField(auto_now_add=True, verbose_name="created at")),
+                ("started_at", models.DateTimeField(editable=False, null=True, verbose_name="started at")),
+                ("finished_at", models.DateTimeField(editable=False, null=True, verbose_name="finished at")),
+                (
+                    "gym",
+                    models.ForeignKey(
+                        blank=True,
+                        help_text="All gyms if empty.",
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="core.gym",
+                        verbose_name="gym",
+                    ),
+                ),
+                (
+                    "requested_by",
+                    models.ForeignKey(
+                        editable=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="requested by",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "report",
+                "verbose_name_plural": "reports",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="reportjob",
+            index=models.Index(fields=["status", "created_at"], name="reportjob_status_created_idx"),
+        ),
+    ]
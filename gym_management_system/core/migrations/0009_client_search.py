@@ -0,0 +1,56 @@
+# Generated by Django 4.1.8 on 2026-10-18 07:16
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.contrib.postgres.operations import AddIndexConcurrently, TrigramExtension
+from django.db import migrations, models, transaction
+
+# clients (by pk range) whose phone is normalized per UPDATE, each committed on its own
+NORMALIZE_BATCH_SIZE = 50000
+
+# strip everything but digits from the stored phone numbers, as Client.save() now does
+NORMALIZE_PHONES = r"""
+UPDATE core_client
+SET phone = NULLIF(regexp_replace(phone, '\D', '', 'g'), '')
+WHERE phone !~ '^[0-9]+$' AND id >= %s AND id < %s
+"""
+
+
+def normalize_phones(apps, schema_editor):
+    Client = apps.get_model("core", "Client")
+    bounds = Client.objects.aggregate(low=models.Min("pk"), high=models.Max("pk"))
+    if bounds["low"] is None:
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for start in range(bounds["low"], bounds["high"] + 1, NORMALIZE_BATCH_SIZE):
+            # short transactions: the table stays writable and no batch holds its row locks for long
+            with transaction.atomic(using=schema_editor.connection.alias):
+                cursor.execute(NORMALIZE_PHONES, [start, start + NORMALIZE_BATCH_SIZE])
+
+
+class Migration(migrations.Migration):
+    # build the indexes without locking writes to the (large) client table
+    atomic = False
+
+    dependencies = [
+        ("core", "0008_reportjob"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(normalize_phones, migrations.RunPython.noop),
+        AddIndexConcurrently(
+            model_name="client",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("name"), name="gin_trgm_ops"
+                ),
+                fastupdate=False,
+                name="client_name_trgm_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="client",
+            index=models.Index(fields=["phone"], name="client_phone_prefix_idx", opclasses=["varchar_pattern_ops"]),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.1.8 on 2026-10-18 07:31
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # build the index without locking writes to the client table
+    atomic = False
+
+    dependencies = [
+        ("core", "0009_client_search"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="client",
+            index=models.Index(fields=["name"], name="client_name_idx"),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 4.1.8 on 2026-10-18 11:02
+
+import django.db.models.deletion
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models, transaction
+
+# transactions (by pk range) given their client's gym per UPDATE, each committed on its own
+BACKFILL_BATCH_SIZE = 50000
+
+
+def backfill_transaction_gyms(apps, schema_editor):
+    Transaction = apps.get_model("core", "Transaction")
+    bounds = Transaction.objects.aggregate(low=models.Min("pk"), high=models.Max("pk"))
+    if bounds["low"] is None:
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for start in range(bounds["low"], bounds["high"] + 1, BACKFILL_BATCH_SIZE):
+            # short transactions: the table stays writable and no batch holds its row locks for long
+            with transaction.atomic(using=schema_editor.connection.alias):
+                cursor.execute(
+                    "UPDATE core_transaction t SET gym_id = c.gym_id FROM core_client c "
+                    "WHERE t.client_id = c.id AND t.gym_id IS NULL AND t.id >= %s AND t.id < %s",
+                    [start, start + BACKFILL_BATCH_SIZE],
+                )
+
+
+class Migration(migrations.Migration):
+    # backfill in batches and build the index without locking writes to the (large) transaction table
+    atomic = False
+
+    dependencies = [
+        ("core", "0010_client_name_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="transaction",
+            name="gym",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                to="core.gym",
+                verbose_name="gym",
+            ),
+        ),
+        migrations.RunPython(backfill_transaction_gyms, migrations.RunPython.noop),
+        AddIndexConcurrently(
+            model_name="transaction",
+            index=models.Index(
+                fields=["gym", "date", "transaction_type"], include=["amount"], name="transaction_gym_date_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,143 @@
+# Generated by Django 4.1.8 on 2026-10-18 13:40
+
+from datetime import date
+
+from django.conf import settings
+from django.db import migrations
+
+# The partition naming and period arithmetic are copied from core.partitions as they were
+# when this migration was written, so replaying it never depends on the current app code.
+
+COLUMNS = "id, transaction_type, amount, date, description, client_id, gym_id"
+# partitions are created this many months ahead of today
+MONTHS_AHEAD = 12
+INTERVALS = {"month": 1, "year": 12}
+
+# free the names of the old table's indexes, which the new table's indexes take over
+DETACH_TABLE = [
+    "ALTER TABLE core_transaction RENAME TO core_transaction_old",
+    "ALTER TABLE core_transaction_old RENAME CONSTRAINT core_transaction_pkey TO core_transaction_old_pkey",
+    "DROP INDEX core_transaction_client_id_e09e6a14",
+    "DROP INDEX transaction_client_type_idx",
+    "DROP INDEX transaction_date_type_idx",
+    "DROP INDEX transaction_gym_date_idx",
+]
+
+CREATE_PARTITIONED_TABLE = [
+    """
+    CREATE TABLE core_transaction (
+        id bigint NOT NULL,
+        transaction_type varchar(10) NOT NULL,
+        amount numeric(10, 2) NOT NULL,
+        date date NOT NULL,
+        description text NULL,
+        client_id bigint NULL,
+        gym_id bigint NULL
+    ) PARTITION BY RANGE (date)
+    """,
+    "CREATE TABLE core_transaction_default PARTITION OF core_transaction DEFAULT",
+]
+
+COPY_ROWS = f"INSERT INTO core_transaction ({COLUMNS}) SELECT {COLUMNS} FROM core_transaction_old"
+
+# the constraints and indexes of both tables, added after the rows are copied so they are built once
+CONSTRAINTS_AND_INDEXES = [
+    "ALTER TABLE core_transaction ADD CONSTRAINT core_transaction_client_id_e09e6a14_fk_core_client_id "
+    "FOREIGN KEY (client_id) REFERENCES core_client (id) DEFERRABLE INITIALLY DEFERRED",
+    "ALTER TABLE core_transaction ADD CONSTRAINT core_transaction_gym_id_6ddaf7c1_fk_core_gym_id "
+    "FOREIGN KEY (gym_id) REFERENCES core_gym (id) DEFERRABLE INITIALLY DEFERRED",
+    "CREATE INDEX core_transaction_client_id_e09e6a14 ON core_transaction (client_id)",
+    "CREATE INDEX transaction_client_type_idx ON core_transaction (client_id, transaction_type) INCLUDE (amount)",
+    "CREATE INDEX transaction_date_type_idx ON core_transaction (date, transaction_type) INCLUDE (amount)",
+    "CREATE INDEX transaction_gym_date_idx ON core_transaction (gym_id, date, transaction_type) INCLUDE (amount)",
+    "ANALYZE core_transaction",
+]
+
+# PostgreSQL 14 has no identity columns on partitioned tables, hence the owned sequence
+FINISH_PARTITIONED_TABLE = [
+    "DROP TABLE core_transaction_old",
+    "CREATE SEQUENCE core_transaction_id_seq OWNED BY core_transaction.id",
+    "SELECT setval('core_transaction_id_seq', COALESCE(MAX(id), 0) + 1, false) FROM core_transaction",
+    "ALTER TABLE core_transaction ALTER COLUMN id SET DEFAULT nextval('core_transaction_id_seq')",
+    "ALTER TABLE core_transaction ADD CONSTRAINT core_transaction_pkey PRIMARY KEY (id, date)",
+] + CONSTRAINTS_AND_INDEXES
+
+# the reverse: back to the plain table of migration 0011, with its identity column
+CREATE_PLAIN_TABLE = [
+    "ALTER SEQUENCE core_transaction_id_seq RENAME TO core_transaction_old_id_seq",
+    """
+    CREATE TABLE core_transaction (
+        id bigint NOT NULL GENERATED BY DEFAULT AS IDENTITY CONSTRAINT core_transaction_pkey PRIMARY KEY,
+        transaction_type varchar(10) NOT NULL,
+        amount numeric(10, 2) NOT NULL,
+        date date NOT NULL,
+        description text NULL,
+        client_id bigint NULL,
+        gym_id bigint NULL
+    )
+    """,
+]
+
+FINISH_PLAIN_TABLE = [
+    "DROP TABLE core_transaction_old",
+    "SELECT setval(pg_get_serial_sequence('core_transaction', 'id'), COALESCE(MAX(id), 0) + 1, false) "
+    "FROM core_transaction",
+] + CONSTRAINTS_AND_INDEXES
+
+
+def add_months(day, months):
+    """The first day of the month ``months`` months after ``day``'s month."""
+    month_index = day.month - 1 + months
+    return date(day.year + month_index // 12, month_index % 12 + 1, 1)
+
+
+def partitions_sql(start, end, interval):
+    """CREATE statements of the partitions of the periods from the one containing ``start`` to ``end``."""
+    current = date(start.year, start.month if interval == "month" else 1, 1)
+    while current <= end:
+        following = add_months(current, INTERVALS[interval])
+        name = f"core_transaction_p{current:%Y_%m}" if interval == "month" else f"core_transaction_p{current:%Y}"
+        yield (
+            f"CREATE TABLE {name} PARTITION OF core_transaction "
+            f"FOR VALUES FROM ('{current.isoformat()}') TO ('{following.isoformat()}')"
+        )
+        current = following
+
+
+def partition_transactions(apps, schema_editor):
+    interval = getattr(settings, "TRANSACTION_PARTITION_INTERVAL", "month")
+    if interval not in INTERVALS:
+        raise ValueError(f"TRANSACTION_PARTITION_INTERVAL must be one of {', '.join(INTERVALS)}.")
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT MIN(date), CURRENT_DATE FROM core_transaction")
+        first_date, today = cursor.fetchone()
+        # through the month MONTHS_AHEAD months from today
+        last_date = add_months(today, MONTHS_AHEAD)
+        for sql in DETACH_TABLE + CREATE_PARTITIONED_TABLE:
+            cursor.execute(sql)
+        for sql in partitions_sql(min(first_date or today, today), last_date, interval):
+            cursor.execute(sql)
+        cursor.execute(COPY_ROWS)
+        for sql in FINISH_PARTITIONED_TABLE:
+            cursor.execute(sql)
+
+
+def unpartition_transactions(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        for sql in DETACH_TABLE + CREATE_PLAIN_TABLE:
+            cursor.execute(sql)
+        cursor.execute(COPY_ROWS)
+        for sql in FINISH_PLAIN_TABLE:
+            cursor.execute(sql)
+
+
+class Migration(migrations.Migration):
+    # rewrites the whole table in one transaction, which blocks writes to it until the end;
+    # migrating back to 0011 rewrites it into a plain table the same way
+    dependencies = [
+        ("core", "0011_transaction_gym"),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_transactions, unpartition_transactions),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.1.8 on 2026-10-18 15:12
+
+from django.db import migrations, models
+
+
+def backfill_heartbeats(apps, schema_editor):
+    # jobs running at deploy time: without a heartbeat the worker would never take them over
+    ReportJob = apps.get_model("core", "ReportJob")
+    ReportJob.objects.filter(status="running").update(heartbeat_at=models.F("started_at"))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0012_partition_transaction"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="reportjob",
+            name="heartbeat_at",
+            field=models.DateTimeField(editable=False, null=True, verbose_name="heartbeat at"),
+        ),
+        migrations.RunPython(backfill_heartbeats, migrations.RunPython.noop),
+    ]
@@ -1,16 +1,103 @@
-from django.db import models
-from django.contrib.auth.models import User
+import calendar
+import re
 from datetime import timedelta
-from django.utils import timezone
+from itertools import islice
 
+from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, connection, models, transaction
+from django.db.models.functions import Coalesce, NullIf, Upper
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from . import caching
+
+# search terms treated as (the start of) a phone number
+PHONE_SEARCH_RE = re.compile(r"\+?[\d\s().-]*\d[\d\s().-]*")
+
+# a membership ending within this many days is reported as "expiring soon"
+EXPIRING_SOON_DAYS = 7
+
+MEMBERSHIP_STATUSES = [
+    ("no_membership", _("no_membership")),
+    ("expired", _("expired")),
+    ("expiring_soon", _("expiring_soon")),
+    ("active", _("active")),
+]
+
+
+def normalize_phone(phone):
+    """Keep only the digits of a phone number, so "+970 59-123-4567" is stored as "970591234567"."""
+    digits = "".join(char for char in phone or "" if char.isdigit())
+    return digits or None
+
+
+def batched(iterable, size):
+    """Yield lists of at most ``size`` items from ``iterable``."""
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def add_months(day, months):
+    """The same day ``months`` months later, clamped to the end of shorter months."""
+    month_index = day.month - 1 + months
+    year, month = day.year + month_index // 12, month_index % 12 + 1
+    return day.replace(year=year, month=month, day=min(day.day, calendar.monthrange(year, month)[1]))
+
+
+def get_membership_status(latest_end_date, today=None):
+    """Derive the membership status code from the client's latest membership end date."""
+    today = today or timezone.now().date()
+    if latest_end_date is None:
+        return "no_membership"
+    if latest_end_date < today:
+        return "expired"
+    if latest_end_date <= today + timedelta(days=EXPIRING_SOON_DAYS):
+        return "expiring_soon"
+    return "active"
+
+
+class GymQuerySet(models.QuerySet):
+    def with_financials(self, start_date=None, end_date=None):
+        """
+        Annotate each gym with ``client_count``, ``income``, ``expenses`` and ``net_balance``.
+
+        Every figure is a correlated subquery, so clients and transactions are never joined
+        into the gym rows and the counts and sums are not multiplied by each other.
+        ``start_date`` and ``end_date`` limit the transactions to that (inclusive) period.
+        """
+        client_count = (
+            Client.objects.filter(gym=models.OuterRef("pk"))
+            .order_by()
+            .values("gym")
+            .annotate(count=models.Count("pk"))
+            .values("count")
+        )
+        return self.annotate(
+            client_count=Coalesce(models.Subquery(client_count), 0),
+            income=self._transaction_total("income", start_date, end_date),
+            expenses=self._transaction_total("expense", start_date, end_date),
+        ).annotate(net_balance=models.F("income") - models.F("expenses"))
+
+    @staticmethod
+    def _transaction_total(transaction_type, start_date, end_date):
+        # read the daily rollup rather than the transactions themselves
+        totals = GymDailyTotal.objects.filter(gym=models.OuterRef("pk"), transaction_type=transaction_type).period(
+            start_date, end_date
+        )
+        total = totals.order_by().values("gym").annotate(total=models.Sum("total")).values("total")
+        return Coalesce(models.Subquery(total), models.Value(0), output_field=models.DecimalField())
+
 
 class Gym(models.Model):
     class Meta:
         verbose_name = _("gym")
         verbose_name_plural = _("gyms")
 
+    objects = GymQuerySet.as_manager()
+
     name = models.CharField(_("name"), max_length=100)
     address = models.TextField(_("address"))
     phone = models.CharField(_("phone"), max_length=15, blank=True, null=True)
@@ -19,22 +106,24 @@ class Gym(models.Model):
     def __str__(self):
         return self.name
 
+    # the methods below use the annotations from GymQuerySet.with_financials() when available
     def total_clients(self):
+        if hasattr(self, "client_count"):
+            return self.client_count
         return Client.objects.filter(gym=self).count()
 
     def total_income(self):
+        if hasattr(self, "income"):
+            return self.income
         return (
-            Transaction.objects.filter(transaction_type="income", client__gym=self).aggregate(
-                total=models.Sum("amount")
-            )["total"]
-            or 0
+            self.gymdailytotal_set.filter(transaction_type="income").aggregate(total=models.Sum("total"))["total"] or 0
         )
 
     def total_expenses(self):
+        if hasattr(self, "expenses"):
+            return self.expenses
         return (
-            Transaction.objects.filter(transaction_type="expense", client__gym=self).aggregate(
-                total=models.Sum("amount")
-            )["total"]
+            self.gymdailytotal_set.filter(transaction_type="expense").aggregate(total=models.Sum("total"))["total"]
             or 0
         )
 
@@ -42,60 +131,298 @@ class Gym(models.Model):
         return self.total_income() - self.total_expenses()
 
 
+def membership_status_expression(end_date_field, today):
+    """SQL counterpart of get_membership_status() for the end date stored in ``end_date_field``."""
+    return models.Case(
+        models.When(**{f"{end_date_field}__isnull": True}, then=models.Value("no_membership")),
+        models.When(**{f"{end_date_field}__lt": today}, then=models.Value("expired")),
+        models.When(
+            **{f"{end_date_field}__lte": today + timedelta(days=EXPIRING_SOON_DAYS)},
+            then=models.Value("expiring_soon"),
+        ),
+        default=models.Value("active"),
+        output_field=models.CharField(max_length=20),
+    )
+
+
+def membership_status_change_expression(end_date_field, today):
+    """The date on which the status derived from ``end_date_field`` changes next (NULL if it never does)."""
+    return models.Case(
+        models.When(**{f"{end_date_field}__lt": today}, then=models.Value(None)),
+        models.When(
+            **{f"{end_date_field}__lte": today + timedelta(days=EXPIRING_SOON_DAYS)},
+            then=models.F(end_date_field) + timedelta(days=1),
+        ),
+        default=models.F(end_date_field) - timedelta(days=EXPIRING_SOON_DAYS),
+        output_field=models.DateField(),
+    )
+
+
+class ClientQuerySet(models.QuerySet):
+    def with_membership_status(self):
+        """
+        Annotate each client with ``latest_end_date`` and ``membership_status_code``.
+
+        Both are computed in the same query as the clients themselves, so listing
+        clients with their status costs a fixed number of queries.
+        """
+        today = timezone.now().date()
+        return self.annotate(latest_end_date=models.Max("membership__end_date")).annotate(
+            membership_status_code=membership_status_expression("latest_end_date", today)
+        )
+
+    def with_stored_membership_status(self):
+        """
+        Like with_membership_status(), but derived from the stored ``membership_end_date``.
+
+        No memberships are joined, so the cost per row is constant however large the tables are.
+        """
+        today = timezone.now().date()
+        return self.annotate(
+            latest_end_date=models.F("membership_end_date"),
+            membership_status_code=membership_status_expression("membership_end_date", today),
+        )
+
+    def refresh_membership_summary(self, today=None):
+        """
+        Recompute the stored membership summary of the selected clients from their memberships.
+
+        Runs two UPDATE statements regardless of the number of clients.
+        """
+        today = today or timezone.now().date()
+        latest_end_date = (
+            Membership.objects.filter(client=models.OuterRef("pk"))
+            .values("client")
+            .annotate(latest=models.Max("end_date"))
+            .values("latest")
+        )
+        self.update(membership_end_date=models.Subquery(latest_end_date))
+        return self.update(
+            membership_state=membership_status_expression("membership_end_date", today),
+            membership_state_changes_on=membership_status_change_expression("membership_end_date", today),
+        )
+
+    def sweep_membership_states(self, today=None):
+        """
+        Move clients whose stored status is due to change on or before ``today`` to their new status.
+
+        Only rows found through the ``membership_state_changes_on`` index are touched.
+        """
+        today = today or timezone.now().date()
+        return self.filter(membership_state_changes_on__lte=today).update(
+            membership_state=membership_status_expression("membership_end_date", today),
+            membership_state_changes_on=membership_status_change_expression("membership_end_date", today),
+        )
+
+    def add_to_balance(self, transaction_type, amount):
+        """
+        Add a transaction ``amount`` (negative to remove one) to the stored totals of the selected clients.
+
+        A single UPDATE with F() expressions, so concurrent payments for the same client are
+        serialized by the row lock instead of overwriting each other.
+        """
+        if transaction_type == "income":
+            return self.update(
+                income_total=models.F("income_total") + amount, current_balance=models.F("current_balance") + amount
+            )
+        return self.update(
+            expenses_total=models.F("expenses_total") + amount, current_balance=models.F("current_balance") - amount
+        )
+
+    def refresh_balances(self):
+        """Recompute the stored totals of the selected clients from their transactions in one UPDATE."""
+
+        def total(transaction_type):
+            totals = (
+                Transaction.objects.filter(client=models.OuterRef("pk"), transaction_type=transaction_type)
+                .order_by()
+                .values("client")
+                .annotate(total=models.Sum("amount"))
+                .values("total")
+            )
+            return Coalesce(models.Subquery(totals), models.Value(0), output_field=models.DecimalField())
+
+        return self.update(
+            income_total=total("income"),
+            expenses_total=total("expense"),
+            current_balance=total("income") - total("expense"),
+        )
+
+    def expiring(self, days=EXPIRING_SOON_DAYS, today=None):
+        """Clients whose latest membership ends within the next ``days`` days."""
+        today = today or timezone.now().date()
+        return self.filter(membership_end_date__range=(today, today + timedelta(days=days)))
+
+    def lapsed(self, since, today=None):
+        """Clients whose latest membership ended between ``since`` and yesterday."""
+        today = today or timezone.now().date()
+        return self.filter(membership_end_date__gte=since, membership_end_date__lt=today)
+
+    def search(self, term):
+        """
+        Clients matching a front-desk search: a phone number prefix, or part of the name.
+
+        A term made of digits and phone punctuation is matched against the start of the stored
+        digits-only phone number (client_phone_prefix_idx); anything else against the name,
+        case-insensitively (client_name_trgm_idx).
+        """
+        term = term.strip()
+        if not term:
+            return self
+        if PHONE_SEARCH_RE.fullmatch(term):
+            return self.filter(phone__startswith=normalize_phone(term))
+        return self.filter(name__icontains=term)
+
+
 class Client(models.Model):
     class Meta:
         verbose_name = _("client")
         verbose_name_plural = _("clients")
+        indexes = [
+            # the per-gym range scans of the expiring-membership reminders
+            models.Index(fields=["gym", "membership_end_date"], name="client_gym_end_date_idx"),
+            # search: ILIKE '%term%' on the name (Django's icontains compares UPPER() values); without a
+            # pending list, which searches would scan in full after every bulk import until the next vacuum
+            GinIndex(OpClass(Upper("name"), name="gin_trgm_ops"), fastupdate=False, name="client_name_trgm_idx"),
+            # the admin's autocomplete boxes, which list clients by name
+            models.Index(fields=["name"], name="client_name_idx"),
+            # search: LIKE 'digits%' on the normalized phone number
+            models.Index(fields=["phone"], opclasses=["varchar_pattern_ops"], name="client_phone_prefix_idx"),
+        ]
+
+    objects = ClientQuerySet.as_manager()
 
     name = models.CharField(_("name"), max_length=100)
     phone = models.CharField(_("phone"), max_length=15, blank=True, null=True)
     gym = models.ForeignKey(Gym, on_delete=models.CASCADE, verbose_name=_("gym"))
 
+    # membership summary, kept current by core.signals and the update_membership_states command
+    membership_end_date = models.DateField(_("membership end date"), null=True, editable=False, db_index=True)
+    membership_state = models.CharField(
+        _("membership state"),
+        max_length=20,
+        choices=MEMBERSHIP_STATUSES,
+        default="no_membership",
+        editable=False,
+        db_index=True,
+    )
+    membership_state_changes_on = models.DateField(
+        _("membership state changes on"), null=True, editable=False, db_index=True
+    )
+
+    # transaction totals, kept current by core.signals and the rebuild_client_balances command
+    income_total = models.DecimalField(_("total income"), max_digits=14, decimal_places=2, default=0, editable=False)
+    expenses_total = models.DecimalField(
+        _("total expenses"), max_digits=14, decimal_places=2, default=0, editable=False
+    )
+    current_balance = models.DecimalField(
+        _("balance"), max_digits=14, decimal_places=2, default=0, editable=False, db_index=True
+    )
+
+    # columns only ever written with UPDATE statements; saving a client must not write
+    # back the (possibly stale) values it was loaded with
+    MAINTAINED_FIELDS = {
+        "membership_end_date",
+        "membership_state",
+        "membership_state_changes_on",
+        "income_total",
+        "expenses_total",
+        "current_balance",
+    }
+
     def __str__(self):
         return self.name
 
-    def membership_status(self):
-        now = timezone.now().date()
-        if not self.membership_set.exists():
-            return "no_membership", _("no_membership")
-        active_memberships = self.membership_set.filter(end_date__gte=now)
-        if not active_memberships.exists():
-            return "expired", _("expired")
+    def save(self, *args, **kwargs):
+        self.phone = normalize_phone(self.phone)
+        if not self._state.adding and kwargs.get("update_fields") is None and not kwargs.get("force_insert"):
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.MAINTAINED_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+    def get_latest_end_date(self):
+        # use the annotation from ClientQuerySet.with_membership_status() when available
+        if hasattr(self, "latest_end_date"):
+            return self.latest_end_date
+        return self.membership_set.aggregate(latest=models.Max("end_date"))["latest"]
 
-        soon_expiring_memberships = active_memberships.filter(end_date__lte=now + timedelta(days=7))
-        if soon_expiring_memberships.exists():
-            return "expiring_soon", _("expiring_soon")
-
-        return "active", _("active")
+    def membership_status(self):
+        status = getattr(self, "membership_status_code", None)
+        if status is None:
+            status = get_membership_status(self.get_latest_end_date())
+        return status, dict(MEMBERSHIP_STATUSES)[status]
 
     def total_expenses(self):
-        return (
-            self.transaction_set.filter(transaction_type="expense").aggregate(total=models.Sum("amount"))["total"] or 0
-        )
+        return self.expenses_total
 
     def total_income(self):
-        return (
-            self.transaction_set.filter(transaction_type="income").aggregate(total=models.Sum("amount"))["total"] or 0
-        )
+        return self.income_total
 
     def balance(self):
-        return self.total_income() - self.total_expenses()
+        return self.current_balance
 
     # last day of active membership (if any)
     def last_membership_day(self):
-        now = timezone.now().date()
-        if self.membership_set.exists():
-            active_memberships = self.membership_set.filter(end_date__gte=now)
-            if active_memberships.exists():
-                return active_memberships.latest("end_date").end_date.strftime("%-d-%-m-%Y")
+        latest_end_date = self.get_latest_end_date()
+        if latest_end_date is not None and latest_end_date >= timezone.now().date():
+            return latest_end_date.strftime("%-d-%-m-%Y")
         return None
 
 
+class MembershipTypeQuerySet(models.QuerySet):
+    def with_analytics(self, start_date=None, end_date=None, today=None):
+        """
+        Annotate each membership type with figures about its memberships, in one grouped query.
+
+        - ``active_members``: clients with a membership of the type running today
+        - ``total_members``: clients who have ever had one
+        - ``membership_count``: memberships of the type
+        - ``memberships_sold`` and ``revenue``: memberships starting in the (inclusive) period,
+          and their value at the type's current price, since memberships don't record the
+          price paid
+        - ``average_tenure``: days of membership of the type per member
+        """
+        today = today or timezone.now().date()
+        sold = models.Q()
+        if start_date:
+            sold &= models.Q(membership__start_date__gte=start_date)
+        if end_date:
+            sold &= models.Q(membership__start_date__lte=end_date)
+        # date - date is a number of days in PostgreSQL
+        days = models.Func(
+            models.F("membership__end_date"),
+            models.F("membership__start_date"),
+            template="(%(expressions)s + 1)",
+            arg_joiner=" - ",
+            output_field=models.IntegerField(),
+        )
+        return self.annotate(
+            active_members=models.Count(
+                "membership__client",
+                filter=models.Q(membership__start_date__lte=today, membership__end_date__gte=today),
+                distinct=True,
+            ),
+            total_members=models.Count("membership__client", distinct=True),
+            membership_count=models.Count("membership"),
+            memberships_sold=models.Count("membership", filter=sold),
+            revenue=models.Sum("price", filter=sold & models.Q(membership__isnull=False), default=0),
+            average_tenure=models.ExpressionWrapper(
+                models.Sum(days) * 1.0 / NullIf(models.Count("membership__client", distinct=True), 0),
+                output_field=models.FloatField(),
+            ),
+        )
+
+
 class MembershipType(models.Model):
     class Meta:
         verbose_name = _("membership type")
         verbose_name_plural = _("membership types")
 
+    objects = MembershipTypeQuerySet.as_manager()
+
     name = models.CharField(_("name"), max_length=100)
     duration_months = models.PositiveIntegerField(_("duration in months"))
     price = models.DecimalField(_("price"), max_digits=10, decimal_places=2)
@@ -104,13 +431,78 @@ class MembershipType(models.Model):
         return self.name
 
     def num_clients(self):
+        # the annotation from MembershipTypeQuerySet.with_analytics() when available
+        if hasattr(self, "membership_count"):
+            return self.membership_count
         return Membership.objects.filter(membership_type=self).count()
 
 
+class MembershipQuerySet(models.QuerySet):
+    def renew(self, clients, membership_type, add_income_transaction=True, today=None):
+        """
+        Give each of ``clients`` a new ``membership_type`` membership, in a fixed number of queries.
+
+        A client's new membership starts the day after their current one ends, or today when
+        they have none or it has lapsed. The memberships (and their income transactions) are
+        written with bulk_create, which skips the signals, so the client summaries, balances
+        and daily totals are then updated with set-based statements instead.
+        """
+        today = today or timezone.now().date()
+        rows = (
+            Client.objects.filter(pk__in=clients.values("pk"))
+            .values_list("pk", "name", "gym_id")
+            .annotate(latest_end_date=models.Max("membership__end_date"))
+        )
+        memberships, transactions, daily_totals = [], [], {}
+        for client_id, client_name, gym_id, latest_end_date in rows:
+            start_date = max(latest_end_date + timedelta(days=1), today) if latest_end_date else today
+            end_date = add_months(start_date, membership_type.duration_months) - timedelta(days=1)
+            memberships.append(
+                self.model(
+                    client_id=client_id, membership_type=membership_type, start_date=start_date, end_date=end_date
+                )
+            )
+            if add_income_transaction:
+                transactions.append(
+                    Transaction(
+                        transaction_type="income",
+                        client_id=client_id,
+                        gym_id=gym_id,
+                        amount=membership_type.price,
+                        date=start_date,
+                        description=_("Income for {0} membership of {1}").format(membership_type, client_name),
+                    )
+                )
+                daily_totals[gym_id, start_date] = daily_totals.get((gym_id, start_date), 0) + 1
+
+        client_ids = [membership.client_id for membership in memberships]
+        with transaction.atomic():
+            created = self.bulk_create(memberships)
+            Client.objects.filter(pk__in=client_ids).refresh_membership_summary(today)
+            if transactions:
+                Transaction.objects.bulk_create(transactions)
+                Client.objects.filter(pk__in=client_ids).add_to_balance("income", membership_type.price)
+                GymDailyTotal.objects.add_many(
+                    (gym_id, date, "income", count * membership_type.price, count)
+                    for (gym_id, date), count in daily_totals.items()
+                )
+                caching.invalidate("gym-statistics")
+            caching.invalidate("membership-type-statistics")
+        return created
+
+
 class Membership(models.Model):
     class Meta:
         verbose_name = _("membership")
         verbose_name_plural = _("memberships")
+        indexes = [
+            # a client's latest end date and "is active today" checks
+            models.Index(fields=["client", "end_date"], name="membership_client_end_idx"),
+            # memberships ending in a date range, across all clients
+            models.Index(fields=["end_date"], include=["client"], name="membership_end_idx"),
+        ]
+
+    objects = MembershipQuerySet.as_manager()
 
     client = models.ForeignKey(Client, on_delete=models.CASCADE, verbose_name=_("client"))
     membership_type = models.ForeignKey(MembershipType, on_delete=models.CASCADE, verbose_name=_("membership type"))
@@ -132,9 +524,22 @@ class Membership(models.Model):
 
 
 class Transaction(models.Model):
+    # the table is partitioned by date; see core.partitions
     class Meta:
         verbose_name = _("transaction")
         verbose_name_plural = _("transactions")
+        indexes = [
+            # per-client totals by type, answered from the index alone
+            models.Index(
+                fields=["client", "transaction_type"], include=["amount"], name="transaction_client_type_idx"
+            ),
+            # date range reports
+            models.Index(fields=["date", "transaction_type"], include=["amount"], name="transaction_date_type_idx"),
+            # a gym's transactions and their totals by day (this also serves the gym foreign key)
+            models.Index(
+                fields=["gym", "date", "transaction_type"], include=["amount"], name="transaction_gym_date_idx"
+            ),
+        ]
 
     TRANSACTION_TYPES = [
         ("income", _("Income")),
@@ -146,3 +551,206 @@ class Transaction(models.Model):
     date = models.DateField(_("date"))
     description = models.TextField(_("description"), blank=True, null=True)
     client = models.ForeignKey(Client, on_delete=models.CASCADE, null=True, blank=True)
+    # the client's gym, or for expenses of the gym itself (rent, equipment...) the gym alone
+    gym = models.ForeignKey(
+        Gym, on_delete=models.CASCADE, null=True, blank=True, db_index=False, verbose_name=_("gym")
+    )
+
+    def clean(self):
+        if self.client_id and self.gym_id and self.gym_id != self.client.gym_id:
+            raise ValidationError({"gym": _("A client's transactions belong to the client's gym.")})
+
+    def save(self, *args, **kwargs):
+        if self.client_id:
+            self.gym_id = self.client.gym_id
+        super().save(*args, **kwargs)
+
+
+class GymDailyTotalQuerySet(models.QuerySet):
+    def period(self, start_date=None, end_date=None):
+        queryset = self
+        if start_date:
+            queryset = queryset.filter(date__gte=start_date)
+        if end_date:
+            queryset = queryset.filter(date__lte=end_date)
+        return queryset
+
+    def add(self, gym_id, date, transaction_type, amount, count=1):
+        """
+        Add ``amount`` and ``count`` (negative to subtract) to a gym's total for a day.
+
+        The row is incremented in place with F() expressions, so concurrent writers don't lose
+        updates; when the row does not exist yet it is created, retrying the increment if another
+        writer created it first.
+        """
+        totals = self.filter(gym_id=gym_id, date=date, transaction_type=transaction_type)
+        if totals.update(total=models.F("total") + amount, count=models.F("count") + count):
+            return
+        try:
+            with transaction.atomic():
+                self.create(gym_id=gym_id, date=date, transaction_type=transaction_type, total=amount, count=count)
+        except IntegrityError:
+            totals.update(total=models.F("total") + amount, count=models.F("count") + count)
+
+    def add_many(self, entries):
+        """
+        Add several ``(gym_id, date, transaction_type, amount, count)`` entries in one statement.
+
+        An INSERT ... ON CONFLICT DO UPDATE increments existing rows in place and creates missing
+        ones, so concurrent writers neither lose updates nor race to create the same row. The
+        proposed rows must satisfy the table's constraints, so only positive counts can be added.
+        """
+        entries = list(entries)
+        if not entries:
+            return
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        values = ", ".join(["(%s, %s, %s, %s, %s)"] * len(entries))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} (gym_id, date, transaction_type, total, count) VALUES {values} "
+                "ON CONFLICT (gym_id, date, transaction_type) DO UPDATE "
+                f"SET total = {table}.total + EXCLUDED.total, count = {table}.count + EXCLUDED.count",
+                [value for entry in entries for value in entry],
+            )
+
+    def rebuild(self, gyms=None, batch_size=1000):
+        """Recompute the totals of ``gyms`` (every gym by default) from their transactions."""
+        transactions = Transaction.objects.filter(gym__isnull=False)
+        totals = self.all()
+        if gyms is not None:
+            transactions = transactions.filter(gym__in=gyms)
+            totals = totals.filter(gym__in=gyms)
+        rows = (
+            transactions.order_by()
+            .values("gym", "date", "transaction_type")
+            .annotate(total=models.Sum("amount"), count=models.Count("pk"))
+        )
+        with transaction.atomic():
+            totals.delete()
+            created = 0
+            for batch in batched(rows.iterator(chunk_size=batch_size), batch_size):
+                created += len(
+                    self.bulk_create(
+                        self.model(
+                            gym_id=row["gym"],
+                            date=row["date"],
+                            transaction_type=row["transaction_type"],
+                            total=row["total"],
+                            count=row["count"],
+                        )
+                        for row in batch
+                    )
+                )
+            caching.invalidate("gym-statistics")
+        return created
+
+
+class GymDailyTotal(models.Model):
+    """
+    Sum and number of a gym's transactions of one type on one day.
+
+    Kept current by core.signals and rebuilt by the rebuild_daily_totals command, so gym-level
+    financial figures read a few rows per day instead of every transaction.
+    """
+
+    class Meta:
+        verbose_name = _("gym daily total")
+        verbose_name_plural = _("gym daily totals")
+        constraints = [
+            models.UniqueConstraint(fields=["gym", "date", "transaction_type"], name="unique_gym_daily_total"),
+        ]
+
+    objects = GymDailyTotalQuerySet.as_manager()
+
+    gym = models.ForeignKey(Gym, on_delete=models.CASCADE, verbose_name=_("gym"))
+    date = models.DateField(_("date"))
+    transaction_type = models.CharField(_("transaction type"), max_length=10, choices=Transaction.TRANSACTION_TYPES)
+    total = models.DecimalField(_("total"), max_digits=14, decimal_places=2, default=0)
+    count = models.PositiveIntegerField(_("count"), default=0)
+
+    def __str__(self):
+        return f"{self.gym_id} {self.date} {self.transaction_type}: {self.total}"
+
+
+class MembershipReminder(models.Model):
+    """
+    A reminder sent to a client that their membership is about to end.
+
+    One per client and membership end date, so the send_membership_reminders command never
+    reminds a client twice about the same membership; renewing moves the end date and makes
+    the client due again.
+    """
+
+    class Meta:
+        verbose_name = _("membership reminder")
+        verbose_name_plural = _("membership reminders")
+        constraints = [
+            models.UniqueConstraint(fields=["client", "membership_end_date"], name="unique_membership_reminder"),
+        ]
+
+    client = models.ForeignKey(Client, on_delete=models.CASCADE, verbose_name=_("client"))
+    membership_end_date = models.DateField(_("membership end date"))
+    sent_at = models.DateTimeField(_("sent at"), auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.client_id} {self.membership_end_date}"
+
+
+class ReportJob(models.Model):
+    """
+    A report requested in the admin and produced by the run_report_worker command.
+
+    Heavy reports take minutes, longer than a web request may run; the worker writes the
+    output to the default storage and records its progress here for the admin to show.
+    """
+
+    KINDS = [
+        ("gym_pnl", _("Monthly profit and loss per gym")),
+        ("transaction_history", _("Transaction history")),
+    ]
+    STATUSES = [
+        ("pending", _("Pending")),
+        ("running", _("Running")),
+        ("done", _("Done")),
+        ("failed", _("Failed")),
+    ]
+
+    class Meta:
+        verbose_name = _("report")
+        verbose_name_plural = _("reports")
+        indexes = [
+            # the worker's queue: the oldest pending job first
+            models.Index(fields=["status", "created_at"], name="reportjob_status_created_idx"),
+        ]
+
+    kind = models.CharField(_("report"), max_length=30, choices=KINDS)
+    gym = models.ForeignKey(
+        Gym, on_delete=models.CASCADE, null=True, blank=True, verbose_name=_("gym"), help_text=_("All gyms if empty.")
+    )
+    start_date = models.DateField(_("start date"), null=True, blank=True)
+    end_date = models.DateField(_("end date"), null=True, blank=True)
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, editable=False, verbose_name=_("requested by")
+    )
+    status = models.CharField(_("status"), max_length=10, choices=STATUSES, default="pending", editable=False)
+    progress = models.PositiveSmallIntegerField(_("progress"), default=0, editable=False)
+    output = models.FileField(_("output"), upload_to="reports/%Y/%m/", blank=True, editable=False)
+    error = models.TextField(_("error"), blank=True, editable=False)
+    created_at = models.DateTimeField(_("created at"), auto_now_add=True)
+    started_at = models.DateTimeField(_("started at"), null=True, editable=False)
+    # refreshed by the worker as the job progresses; a running job whose heartbeat stops was orphaned
+    heartbeat_at = models.DateTimeField(_("heartbeat at"), null=True, editable=False)
+    finished_at = models.DateTimeField(_("finished at"), null=True, editable=False)
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.pk}"
+
+    def clean(self):
+        if self.start_date and self.end_date and self.start_date > self.end_date:
+            raise ValidationError(_("The start date must be before the end date."))
+
+    def set_progress(self, done, total):
+        """Store the progress as a percentage and beat the heartbeat, with an UPDATE that commits on its own."""
+        self.progress = min(100 * done // total, 100) if total else 100
+        self.heartbeat_at = timezone.now()
+        ReportJob.objects.filter(pk=self.pk).update(progress=self.progress, heartbeat_at=self.heartbeat_at)
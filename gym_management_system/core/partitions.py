@@ -0,0 +1,105 @@
+"""
+Range partitions of the transaction table by date.
+
+core_transaction is partitioned by month or by year (settings.TRANSACTION_PARTITION_INTERVAL)
+since migration 0012, plus a default partition that takes the rows of dates no partition
+covers. Queries through the Transaction model are unchanged; those bounded by date only read
+the partitions of their period. The create_transaction_partitions command creates the
+partitions of the coming periods ahead of time.
+
+The primary key is (id, date), as PostgreSQL requires the partition key in every unique
+constraint; the ids stay unique because they all come from one sequence. Indexes cannot be
+built concurrently on a partitioned table, so later migrations must add theirs with AddIndex.
+"""
+import re
+from datetime import date
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+
+from .models import Transaction, add_months
+
+TABLE = Transaction._meta.db_table
+DEFAULT_PARTITION = f"{TABLE}_default"
+INTERVALS = {"month": 1, "year": 12}
+# partitions are created this many months ahead of today
+MONTHS_AHEAD = 12
+
+BOUND_RE = re.compile(r"FROM \('([0-9-]+)'\) TO \('([0-9-]+)'\)")
+
+
+def get_interval():
+    interval = getattr(settings, "TRANSACTION_PARTITION_INTERVAL", "month")
+    if interval not in INTERVALS:
+        raise ImproperlyConfigured(f"TRANSACTION_PARTITION_INTERVAL must be one of {', '.join(INTERVALS)}.")
+    return interval
+
+
+def partition_name(start, interval):
+    return f"{TABLE}_p{start:%Y_%m}" if interval == "month" else f"{TABLE}_p{start:%Y}"
+
+
+def periods(start, end, interval):
+    """The ``(from, to)`` bounds of the periods from the one containing ``start`` to the one containing ``end``."""
+    current = start.replace(day=1) if interval == "month" else start.replace(month=1, day=1)
+    while current <= end:
+        following = add_months(current, INTERVALS[interval])
+        yield current, following
+        current = following
+
+
+def get_partitions(connection):
+    """The range partitions of the table as ``(name, from, to)`` tuples, in date order."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid WHERE i.inhparent = %s::regclass",
+            [TABLE],
+        )
+        rows = cursor.fetchall()
+    partitions = []
+    for name, bound in rows:
+        # the default partition has no bounds
+        if match := BOUND_RE.search(bound):
+            partitions.append((name, date.fromisoformat(match[1]), date.fromisoformat(match[2])))
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+def create_partitions(connection, start, end, interval=None):
+    """
+    Create the missing partitions of the periods from ``start`` to ``end``, returning their names.
+
+    Periods that overlap an existing partition are skipped. The rows of a new partition's
+    period that the default partition holds are moved into it.
+    """
+    interval = interval or get_interval()
+    existing = get_partitions(connection)
+    quote = connection.ops.quote_name
+    created = []
+    for low, high in periods(start, end, interval):
+        if any(low < to and from_ < high for _name, from_, to in existing):
+            continue
+        name = partition_name(low, interval)
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            # a partition can't be added while the default partition holds rows of its period
+            cursor.execute(f"CREATE TEMPORARY TABLE moved_transactions (LIKE {quote(TABLE)})")
+            cursor.execute(
+                f"WITH moved AS (DELETE FROM {quote(DEFAULT_PARTITION)} WHERE date >= %s AND date < %s RETURNING *) "
+                "INSERT INTO moved_transactions SELECT * FROM moved",
+                [low, high],
+            )
+            cursor.execute(
+                f"CREATE TABLE {quote(name)} PARTITION OF {quote(TABLE)} FOR VALUES FROM (%s) TO (%s)", [low, high]
+            )
+            cursor.execute(f"INSERT INTO {quote(TABLE)} SELECT * FROM moved_transactions")
+            cursor.execute("DROP TABLE moved_transactions")
+        created.append(name)
+    return created
+
+
+def count_default_rows(connection):
+    """The number of transactions in the default partition, i.e. of dates no partition covers."""
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT COUNT(*) FROM {connection.ops.quote_name(DEFAULT_PARTITION)}")
+        return cursor.fetchone()[0]
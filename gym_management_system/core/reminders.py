@@ -0,0 +1,100 @@
+import sys
+from pathlib import Path
+
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from django.utils.translation import gettext as _
+
+from .models import EXPIRING_SOON_DAYS, Client, Gym, MembershipReminder, batched
+
+# messages handed to the backend per call
+REMINDER_BATCH_SIZE = 500
+
+
+class Reminder:
+    def __init__(self, client_id, name, phone, gym, membership_end_date):
+        self.client_id = client_id
+        self.name = name
+        self.phone = phone
+        self.gym = gym
+        self.membership_end_date = membership_end_date
+
+    @property
+    def text(self):
+        return _("Hi {0}, your membership at {1} ends on {2}. Renew it to keep training!").format(
+            self.name, self.gym, self.membership_end_date.strftime("%-d-%-m-%Y")
+        )
+
+
+class BaseBackend:
+    """Delivers reminders; subclasses implement send_messages(), which returns the number sent."""
+
+    def send_messages(self, reminders):
+        raise NotImplementedError
+
+
+class ConsoleBackend(BaseBackend):
+    """Writes each reminder to a stream, stdout by default."""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def send_messages(self, reminders):
+        for reminder in reminders:
+            self.stream.write(f"{reminder.phone or '-'}\t{reminder.text}\n")
+        self.stream.flush()
+        return len(reminders)
+
+
+class FileBackend(ConsoleBackend):
+    """Appends each reminder to the file at settings.MEMBERSHIP_REMINDER_FILE_PATH."""
+
+    def __init__(self, path=None):
+        self.path = Path(path or settings.MEMBERSHIP_REMINDER_FILE_PATH)
+
+    def send_messages(self, reminders):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a") as self.stream:
+            return super().send_messages(reminders)
+
+
+def get_backend(path=None):
+    return import_string(path or settings.MEMBERSHIP_REMINDER_BACKEND)()
+
+
+def send_expiring_reminders(days=EXPIRING_SOON_DAYS, today=None, backend=None, batch_size=REMINDER_BATCH_SIZE):
+    """
+    Remind every client whose membership ends within ``days`` days and who was not reminded yet.
+
+    The clients are selected with one range query per gym on the stored membership end date
+    (indexed by gym and end date), excluding those in the sent-reminders log. They are sent
+    in batches, each logged as soon as the backend accepts it, so a failed run resumes where
+    it stopped. Returns the number of reminders sent.
+    """
+    today = today or timezone.now().date()
+    backend = backend or get_backend()
+    already_reminded = MembershipReminder.objects.filter(
+        client=models.OuterRef("pk"), membership_end_date=models.OuterRef("membership_end_date")
+    )
+    sent = 0
+    for gym_id, gym_name in Gym.objects.order_by("pk").values_list("pk", "name"):
+        clients = (
+            Client.objects.filter(gym=gym_id)
+            .expiring(days, today)
+            .exclude(models.Exists(already_reminded))
+            .order_by("membership_end_date", "pk")
+            .values_list("pk", "name", "phone", "membership_end_date")
+        )
+        for batch in batched(clients.iterator(), batch_size):
+            reminders = [Reminder(pk, name, phone, gym_name, end_date) for pk, name, phone, end_date in batch]
+            sent += backend.send_messages(reminders)
+            MembershipReminder.objects.bulk_create(
+                [
+                    MembershipReminder(client_id=reminder.client_id, membership_end_date=reminder.membership_end_date)
+                    for reminder in reminders
+                ],
+                ignore_conflicts=True,
+            )
+    return sent
@@ -0,0 +1,119 @@
+import csv
+import io
+import tempfile
+import traceback
+from datetime import timedelta
+
+from django.core.files import File
+from django.db import models, transaction
+from django.db.models import Q
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .exports import TRANSACTION_COLUMNS
+from .models import GymDailyTotal, ReportJob, Transaction
+
+# rows read per query by the reports that scan transactions
+REPORT_CHUNK_SIZE = 5000
+# a running job whose heartbeat is this old lost its worker (deploy, out of memory...) and is run again
+STALE_JOB_TIMEOUT = timedelta(minutes=15)
+
+
+def gym_pnl(job, writer):
+    """Income, expenses and net balance of every gym per month, read from the daily totals."""
+    totals = GymDailyTotal.objects.period(job.start_date, job.end_date)
+    if job.gym_id:
+        totals = totals.filter(gym=job.gym_id)
+    gyms = list(totals.order_by("gym__name", "gym").values_list("gym", "gym__name").distinct())
+    writer.writerow(["gym", "month", "income", "expenses", "net"])
+    for done, (gym_id, gym_name) in enumerate(gyms, start=1):
+        months = (
+            totals.filter(gym=gym_id)
+            .annotate(month=TruncMonth("date"))
+            .order_by("month")
+            .values("month")
+            .annotate(
+                income=models.Sum("total", filter=models.Q(transaction_type="income"), default=0),
+                expenses=models.Sum("total", filter=models.Q(transaction_type="expense"), default=0),
+            )
+        )
+        for row in months:
+            writer.writerow(
+                [
+                    gym_name,
+                    row["month"].strftime("%Y-%m"),
+                    row["income"],
+                    row["expenses"],
+                    row["income"] - row["expenses"],
+                ]
+            )
+        job.set_progress(done, len(gyms))
+
+
+def transaction_history(job, writer):
+    """Every transaction of the period, read in pk order one chunk per query."""
+    transactions = Transaction.objects.all()
+    if job.start_date:
+        transactions = transactions.filter(date__gte=job.start_date)
+    if job.end_date:
+        transactions = transactions.filter(date__lte=job.end_date)
+    if job.gym_id:
+        transactions = transactions.filter(gym=job.gym_id)
+    total = transactions.count()
+    headers, fields = zip(*TRANSACTION_COLUMNS)
+    writer.writerow(headers)
+    done, last_pk = 0, 0
+    # keyset batches rather than one long-lived cursor, so each progress update commits on its own
+    while rows := list(transactions.filter(pk__gt=last_pk).order_by("pk").values_list(*fields)[:REPORT_CHUNK_SIZE]):
+        writer.writerows(rows)
+        done += len(rows)
+        last_pk = rows[-1][0]
+        job.set_progress(done, total)
+
+
+REPORTS = {
+    "gym_pnl": gym_pnl,
+    "transaction_history": transaction_history,
+}
+
+
+def claim_next_job():
+    """
+    Mark the oldest pending job as running and return it, or None; concurrent workers skip each other's job.
+
+    A job whose worker was killed stays "running"; it is claimed again once its heartbeat,
+    beaten on every progress update, is STALE_JOB_TIMEOUT old.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        job = (
+            ReportJob.objects.select_for_update(skip_locked=True)
+            .filter(Q(status="pending") | Q(status="running", heartbeat_at__lt=now - STALE_JOB_TIMEOUT))
+            .order_by("created_at")
+            .first()
+        )
+        if job is None:
+            return None
+        job.status, job.started_at, job.heartbeat_at, job.progress = "running", now, now, 0
+        job.save(update_fields=["status", "started_at", "heartbeat_at", "progress"])
+    return job
+
+
+def run_job(job):
+    """Produce the job's report into a temporary file and save it to the default storage."""
+    try:
+        with tempfile.TemporaryFile() as file:
+            text = io.TextIOWrapper(file, encoding="utf-8", newline="")
+            REPORTS[job.kind](job, csv.writer(text))
+            text.flush()
+            file.seek(0)
+            name = f"{job.kind}-{job.pk}.csv"
+            job.output.save(name, File(file, name=name), save=False)
+            text.detach()
+    except Exception:
+        job.status, job.error = "failed", traceback.format_exc()
+    else:
+        job.status, job.progress = "done", 100
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "progress", "output", "error", "finished_at"])
+    return job
@@ -0,0 +1,92 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import caching
+from .models import Client, Gym, GymDailyTotal, Membership, MembershipType, Transaction
+
+
+@receiver(pre_save, sender=Membership)
+def remember_previous_client(sender, instance, raw=False, **kwargs):
+    instance._previous_client_id = None
+    if instance.pk and not raw:
+        instance._previous_client_id = (
+            Membership.objects.filter(pk=instance.pk).values_list("client", flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Membership)
+@receiver(post_delete, sender=Membership)
+def refresh_client_membership_summary(sender, instance, **kwargs):
+    # a membership moved to another client leaves the previous one's summary to refresh too
+    client_ids = {instance.client_id, getattr(instance, "_previous_client_id", None)} - {None}
+    # filter by id: during a cascading client delete the client row may already be gone
+    Client.objects.filter(pk__in=client_ids).refresh_membership_summary()
+
+
+@receiver(post_save, sender=MembershipType)
+@receiver(post_delete, sender=MembershipType)
+@receiver(post_save, sender=Membership)
+@receiver(post_delete, sender=Membership)
+def invalidate_membership_type_statistics(sender, **kwargs):
+    caching.invalidate("membership-type-statistics")
+
+
+@receiver(post_save, sender=Gym)
+@receiver(post_delete, sender=Gym)
+@receiver(post_save, sender=Client)
+@receiver(post_delete, sender=Client)
+@receiver(post_save, sender=Transaction)
+@receiver(post_delete, sender=Transaction)
+def invalidate_gym_statistics(sender, **kwargs):
+    caching.invalidate("gym-statistics")
+
+
+def _apply_transaction(client_id, gym_id, date, transaction_type, amount, sign):
+    """Add (sign=1) or remove (sign=-1) a transaction's contribution to the client and gym totals."""
+    if client_id:
+        Client.objects.filter(pk=client_id).add_to_balance(transaction_type, sign * amount)
+    if gym_id:
+        GymDailyTotal.objects.add(gym_id, date, transaction_type, sign * amount, count=sign)
+
+
+@receiver(pre_save, sender=Transaction)
+def remember_previous_transaction(sender, instance, raw=False, **kwargs):
+    instance._previous_values = None
+    if instance.pk and not raw:
+        previous = Transaction.objects.filter(pk=instance.pk)
+        instance._previous_values = previous.values_list("client", "gym", "date", "transaction_type", "amount").first()
+
+
+@receiver(post_save, sender=Transaction)
+def update_totals_on_transaction_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, "_previous_values", None)
+    if previous:
+        _apply_transaction(*previous, sign=-1)
+    _apply_transaction(
+        instance.client_id, instance.gym_id, instance.date, instance.transaction_type, instance.amount, sign=1
+    )
+
+
+@receiver(post_delete, sender=Transaction)
+def update_totals_on_transaction_delete(sender, instance, **kwargs):
+    _apply_transaction(
+        instance.client_id, instance.gym_id, instance.date, instance.transaction_type, instance.amount, sign=-1
+    )
+
+
+@receiver(pre_save, sender=Client)
+def remember_previous_gym(sender, instance, **kwargs):
+    instance._previous_gym_id = None
+    if instance.pk:
+        instance._previous_gym_id = Client.objects.filter(pk=instance.pk).values_list("gym_id", flat=True).first()
+
+
+@receiver(post_save, sender=Client)
+def rebuild_daily_totals_on_gym_change(sender, instance, created, **kwargs):
+    # moving a client to another gym moves its transaction history with it
+    previous_gym_id = getattr(instance, "_previous_gym_id", None)
+    if not created and previous_gym_id and previous_gym_id != instance.gym_id:
+        Transaction.objects.filter(client=instance).update(gym=instance.gym_id)
+        GymDailyTotal.objects.rebuild(gyms=[previous_gym_id, instance.gym_id])
@@ -0,0 +1,57 @@
+from django.utils import timezone
+
+from . import caching
+from .models import Gym, MembershipType
+
+STATISTICS_CACHE_TIMEOUT = 60 * 60
+
+
+def gym_statistics(start_date=None, end_date=None):
+    """
+    Per-gym client count, income, expenses and balance for the given period, cached.
+
+    The cache is invalidated whenever a gym, client or transaction is written (see core.signals).
+    """
+
+    def compute():
+        return list(
+            Gym.objects.with_financials(start_date, end_date)
+            .order_by("name")
+            .values("pk", "name", "client_count", "income", "expenses", "net_balance")
+        )
+
+    return caching.get_or_compute(
+        "gym-statistics", f"{start_date}:{end_date}", compute, timeout=STATISTICS_CACHE_TIMEOUT
+    )
+
+
+def membership_type_statistics(start_date=None, end_date=None):
+    """
+    Per-type active and total members, memberships sold, revenue and average tenure, cached.
+
+    See MembershipTypeQuerySet.with_analytics(); ``start_date`` and ``end_date`` limit the
+    memberships sold and their revenue to that period. The cache is invalidated whenever a
+    membership or membership type is written (see core.signals), and the active members
+    are counted as of the day the figures were computed.
+    """
+    today = timezone.now().date()
+
+    def compute():
+        return list(
+            MembershipType.objects.with_analytics(start_date, end_date, today)
+            .order_by("name")
+            .values(
+                "pk",
+                "name",
+                "price",
+                "active_members",
+                "total_members",
+                "memberships_sold",
+                "revenue",
+                "average_tenure",
+            )
+        )
+
+    return caching.get_or_compute(
+        "membership-type-statistics", f"{today}:{start_date}:{end_date}", compute, timeout=STATISTICS_CACHE_TIMEOUT
+    )
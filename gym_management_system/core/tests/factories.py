@@ -0,0 +1,53 @@
+from datetime import timedelta
+
+from django.utils import timezone
+from factory import Faker, LazyAttribute, LazyFunction, SubFactory
+from factory.django import DjangoModelFactory
+
+from gym_management_system.core.models import Client, Gym, Membership, MembershipType, Transaction
+
+
+class GymFactory(DjangoModelFactory):
+    name = Faker("company")
+    address = Faker("address")
+
+    class Meta:
+        model = Gym
+
+
+class ClientFactory(DjangoModelFactory):
+    name = Faker("name")
+    phone = Faker("numerify", text="059#######")
+    gym = SubFactory(GymFactory)
+
+    class Meta:
+        model = Client
+
+
+class MembershipTypeFactory(DjangoModelFactory):
+    name = Faker("word")
+    duration_months = 1
+    price = 100
+
+    class Meta:
+        model = MembershipType
+
+
+class MembershipFactory(DjangoModelFactory):
+    client = SubFactory(ClientFactory)
+    membership_type = SubFactory(MembershipTypeFactory)
+    start_date = LazyFunction(lambda: timezone.now().date())
+    end_date = LazyAttribute(lambda o: o.start_date + timedelta(days=30 * o.membership_type.duration_months))
+
+    class Meta:
+        model = Membership
+
+
+class TransactionFactory(DjangoModelFactory):
+    transaction_type = "income"
+    amount = 100
+    date = LazyFunction(lambda: timezone.now().date())
+    client = SubFactory(ClientFactory)
+
+    class Meta:
+        model = Transaction
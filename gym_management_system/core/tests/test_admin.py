@@ -0,0 +1,329 @@
+import csv
+from datetime import timedelta
+
+import pytest
+from django.contrib import admin
+from django.core.exceptions import PermissionDenied
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from django.utils import timezone
+
+from gym_management_system.core import admin_mixins
+from gym_management_system.core.admin_mixins import ListRelatedAdminMixin, split_relation_path
+from gym_management_system.core.forms import ClientForm
+from gym_management_system.core.imports import IMPORT_BATCH_SIZE
+from gym_management_system.core.models import Client, Gym, Membership, MembershipType, ReportJob, Transaction
+
+from .factories import ClientFactory, GymFactory, MembershipFactory, MembershipTypeFactory, TransactionFactory
+
+pytestmark = pytest.mark.django_db
+
+
+class TestClientAdmin:
+    url = reverse("admin:core_client_changelist")
+
+    def test_changelist(self, admin_client):
+        MembershipFactory()
+        response = admin_client.get(self.url)
+        assert response.status_code == 200
+
+    def test_changelist_query_count_is_constant(self, admin_client, django_assert_max_num_queries):
+        MembershipFactory.create_batch(3)
+        with django_assert_max_num_queries(12) as captured:
+            admin_client.get(self.url)
+        MembershipFactory.create_batch(30)
+        with django_assert_max_num_queries(len(captured)):
+            admin_client.get(self.url)
+
+    def test_filter_by_status(self, admin_client):
+        today = timezone.now().date()
+        expired = MembershipFactory(end_date=today - timedelta(days=1)).client
+        active = MembershipFactory(end_date=today + timedelta(days=30)).client
+        no_membership = ClientFactory()
+
+        response = admin_client.get(self.url, data={"membership_status": "expired"})
+        assert list(response.context["cl"].result_list) == [expired]
+        response = admin_client.get(self.url, data={"membership_status": "active"})
+        assert list(response.context["cl"].result_list) == [active]
+        response = admin_client.get(self.url, data={"membership_status": "no_membership"})
+        assert list(response.context["cl"].result_list) == [no_membership]
+
+    def test_form_accepts_formatted_phone_numbers(self):
+        gym = GymFactory()
+
+        form = ClientForm(data={"name": "Sami Haddad", "phone": "+970 59-123-4567", "gym": gym.pk})
+        assert form.is_valid(), form.errors
+        assert form.save().phone == "970591234567"
+
+        form = ClientForm(data={"name": "Sami Haddad", "phone": "+970 59-123-4567-8901", "gym": gym.pk})
+        assert "phone" in form.errors
+
+    def test_sort_by_status(self, admin_client):
+        today = timezone.now().date()
+        active = MembershipFactory(end_date=today + timedelta(days=30)).client
+        no_membership = ClientFactory()
+        expired = MembershipFactory(end_date=today - timedelta(days=1)).client
+
+        # "o=5" orders by membership_status_indicator (column 0 is the action checkbox)
+        response = admin_client.get(self.url, data={"o": "5"})
+        assert list(response.context["cl"].result_list) == [no_membership, expired, active]
+
+    def test_search(self, admin_client):
+        by_name = ClientFactory(name="Ahmad Khalil", phone="0561111111")
+        by_phone = ClientFactory(name="Sami Taha", phone="0599123456")
+
+        response = admin_client.get(self.url, data={"q": "khalil"})
+        assert list(response.context["cl"].result_list) == [by_name]
+        response = admin_client.get(self.url, data={"q": "059 912"})
+        assert list(response.context["cl"].result_list) == [by_phone]
+
+    def test_renew_memberships_action(self, admin_client):
+        clients = ClientFactory.create_batch(2)
+        membership_type = MembershipTypeFactory()
+        data = {"action": "renew_memberships", "_selected_action": [client.pk for client in clients]}
+
+        response = admin_client.post(self.url, data)
+        assert response.status_code == 200
+        assert not Membership.objects.exists()
+
+        data.update(apply="1", membership_type=membership_type.pk, add_income_transaction="on")
+        response = admin_client.post(self.url, data)
+        assert response.status_code == 302
+        assert Membership.objects.filter(membership_type=membership_type).count() == 2
+
+    def test_export_csv_action(self, admin_client):
+        clients = MembershipFactory.create_batch(3)
+        selected = [membership.client.pk for membership in clients[:2]]
+
+        response = admin_client.post(self.url, {"action": "export_csv", "_selected_action": selected})
+
+        assert response["Content-Type"] == "text/csv"
+        rows = list(csv.reader(line.decode() for line in response.streaming_content))
+        assert [row[0] for row in rows[1:]] == [str(pk) for pk in selected]
+
+
+class TestClientImport:
+    url = reverse("admin:core_client_import")
+
+    def test_import(self, admin_client):
+        GymFactory(name="Downtown")
+        file = SimpleUploadedFile(
+            "clients.csv", "name,phone,gym\nSami Haddad,,Downtown\nLina Khalil,,Uptown\n".encode()
+        )
+
+        response = admin_client.post(self.url, {"kind": "clients", "file": file})
+
+        assert response.status_code == 200
+        assert response.context["importer"].created == 1
+        assert response.context["importer"].errors[0][0] == 3
+        assert Client.objects.get().name == "Sami Haddad"
+
+    def test_commits_chunk_by_chunk(self):
+        assert resolve(self.url).func._non_atomic_requests == {"default"}
+
+    def test_undecodable_rows_stop_the_import(self, admin_client):
+        gym = GymFactory()
+        lines = [f"Client {i},,{gym.pk}" for i in range(2 * IMPORT_BATCH_SIZE)]
+        content = ("name,phone,gym\n" + "\n".join(lines) + "\n").encode() + "Zoé,,1\n".encode("latin-1")
+
+        response = admin_client.post(self.url, {"kind": "clients", "file": SimpleUploadedFile("clients.csv", content)})
+
+        # the first chunk was written before the undecodable row was read
+        assert Client.objects.count() == IMPORT_BATCH_SIZE
+        assert response.context["form"].errors["file"] == [
+            f"The file is not UTF-8 encoded; the import stopped after {IMPORT_BATCH_SIZE} rows."
+        ]
+
+    def test_missing_columns(self, admin_client):
+        file = SimpleUploadedFile("clients.csv", b"name\nSami Haddad\n")
+        response = admin_client.post(self.url, {"kind": "clients", "file": file})
+        assert response.context["form"].errors["file"]
+
+    def test_requires_add_permission(self, rf, user):
+        request = rf.get(self.url)
+        request.user = user
+        with pytest.raises(PermissionDenied):
+            admin.site._registry[Client].import_view(request)
+
+
+class TestMembershipAdmin:
+    url = reverse("admin:core_membership_changelist")
+
+    def test_search_shows_capped_count(self, admin_client, monkeypatch):
+        monkeypatch.setattr(admin_mixins, "COUNT_CAP", 2)
+        MembershipFactory.create_batch(3, membership_type__name="Monthly")
+        MembershipFactory(membership_type__name="Yearly")
+
+        response = admin_client.get(self.url, data={"q": "Monthly"})
+
+        assert 'more than 2 results (<a href="?">4 total</a>)' in response.content.decode()
+
+    def test_client_filter_renders_only_the_selected_client(self, admin_client):
+        membership = MembershipFactory(client__name="Ahmad Khalil")
+        MembershipFactory(client__name="Sami Taha")
+
+        response = admin_client.get(self.url, data={"client__id__exact": membership.client_id})
+
+        assert list(response.context["cl"].result_list) == [membership]
+        content = response.content.decode()
+        assert f'<option value="{membership.client_id}" selected>Ahmad Khalil</option>' in content
+        # no filter link per client
+        assert "Sami Taha" not in content
+        assert "js/autocomplete_filter.js" in content
+
+    def test_add_form_does_not_list_clients(self, admin_client):
+        clients = ClientFactory.create_batch(3)
+
+        response = admin_client.get(reverse("admin:core_membership_add"))
+
+        content = response.content.decode()
+        assert "admin-autocomplete" in content
+        assert not any(f'<option value="{client.pk}"' in content for client in clients)
+
+    def test_client_autocomplete(self, admin_client):
+        ahmad = ClientFactory(name="Ahmad Khalil", phone="0599123456")
+        ahmed = ClientFactory(name="Ahmed Taha", phone="0591234567")
+        ClientFactory(name="Sami Taha", phone="0591234568")
+        url = reverse("admin:autocomplete")
+        data = {"app_label": "core", "model_name": "membership", "field_name": "client"}
+
+        response = admin_client.get(url, data={**data, "term": "ahm"})
+        assert [r["id"] for r in response.json()["results"]] == [str(ahmad.pk), str(ahmed.pk)]
+        response = admin_client.get(url, data={**data, "term": "0599"})
+        assert [r["id"] for r in response.json()["results"]] == [str(ahmad.pk)]
+
+
+class TestTransactionAdmin:
+    url = reverse("admin:core_transaction_changelist")
+
+    def test_small_tables_are_counted_exactly(self, admin_client):
+        TransactionFactory.create_batch(3)
+        TransactionFactory(transaction_type="expense")
+
+        response = admin_client.get(self.url, data={"transaction_type__exact": "income"})
+
+        cl = response.context["cl"]
+        assert (cl.result_count, cl.result_count_label) == (3, None)
+        assert (cl.full_result_count, cl.full_result_count_label) == (4, None)
+
+    def test_estimated_and_capped_counts(self, admin_client, monkeypatch):
+        monkeypatch.setattr(admin_mixins, "ESTIMATE_THRESHOLD", 5)
+        monkeypatch.setattr(admin_mixins, "COUNT_CAP", 5)
+        TransactionFactory.create_batch(8)
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE core_transaction")
+
+        with CaptureQueriesContext(connection) as captured:
+            response = admin_client.get(self.url, data={"transaction_type__exact": "income"})
+
+        cl = response.context["cl"]
+        assert (cl.full_result_count, cl.full_result_count_label) == (8, "about 8")
+        assert (cl.result_count, cl.result_count_label) == (5, "more than 5")
+        content = response.content.decode()
+        assert "about 8 total" in content
+        assert "more than 5 transactions" in content
+        # no COUNT(*) over the whole table
+        assert not [q["sql"] for q in captured if "COUNT(*)" in q["sql"] and "WHERE" not in q["sql"]]
+
+    def test_export_csv_action(self, admin_client):
+        transaction = TransactionFactory(description="Towel")
+
+        response = admin_client.post(self.url, {"action": "export_csv", "_selected_action": [transaction.pk]})
+
+        rows = list(csv.reader(line.decode() for line in response.streaming_content))
+        assert rows[1][:5] == [str(transaction.pk), transaction.date.isoformat(), "income", "100.00", "Towel"]
+
+
+class TestGymAdmin:
+    url = reverse("admin:core_gym_changelist")
+
+    def test_changelist_query_count_is_constant(self, admin_client, django_assert_max_num_queries):
+        TransactionFactory.create_batch(3)
+        with django_assert_max_num_queries(10) as captured:
+            admin_client.get(self.url)
+        TransactionFactory.create_batch(30)
+        with django_assert_max_num_queries(len(captured)):
+            admin_client.get(self.url)
+
+    def test_sort_by_balance(self, admin_client):
+        poor, rich = GymFactory.create_batch(2)
+        TransactionFactory(client__gym=poor, transaction_type="expense", amount=10)
+        TransactionFactory(client__gym=rich, transaction_type="income", amount=10)
+
+        # "o=-8" orders by balance, descending (column 0 is the action checkbox)
+        response = admin_client.get(self.url, data={"o": "-8"})
+        assert list(response.context["cl"].result_list) == [rich, poor]
+
+
+@pytest.mark.parametrize(
+    "model, path, expected",
+    [
+        (Transaction, "amount", (None, None)),
+        (Transaction, "client", ("client", None)),
+        (Transaction, "-client__gym__name", ("client__gym", None)),
+        (Transaction, "client__membership__membership_type", ("client", "client__membership_set__membership_type")),
+        (Client, "membership__end_date", (None, "membership_set")),
+    ],
+)
+def test_split_relation_path(model, path, expected):
+    assert split_relation_path(model, path) == expected
+
+
+class TestListRelatedAdminMixin:
+    def get_changelist(self, rf, admin_user, model_admin):
+        request = rf.get("/")
+        request.user = admin_user
+        return model_admin.get_changelist_instance(request)
+
+    def test_joins_the_displayed_relations(self, rf, admin_user):
+        request = rf.get("/")
+        assert admin.site._registry[Membership].get_list_select_related(request) == ["client", "membership_type"]
+        assert admin.site._registry[Transaction].get_list_select_related(request) == ["client", "gym"]
+
+    def test_prefetches_many_valued_relations(self, rf, admin_user, django_assert_num_queries):
+        class MembershipTypesAdmin(ListRelatedAdminMixin, admin.ModelAdmin):
+            list_display = ("name", "membership_types")
+
+            @admin.display(description="Types")
+            def membership_types(self, obj):
+                return ", ".join(str(membership.membership_type) for membership in obj.membership_set.all())
+
+            membership_types.related_fields = ("membership__membership_type",)
+
+        MembershipFactory.create_batch(3)
+        changelist = self.get_changelist(rf, admin_user, MembershipTypesAdmin(Client, admin.site))
+
+        # the clients, their memberships and the memberships' types
+        with django_assert_num_queries(3):
+            for client in changelist.result_list:
+                changelist.model_admin.membership_types(client)
+
+    def test_core_admins_do_not_query_per_row(self, rf, admin_user, settings, caplog):
+        settings.DEBUG = True
+        transaction = TransactionFactory()
+        MembershipFactory(client=transaction.client)
+        ReportJob.objects.create(kind="gym_pnl", gym=transaction.client.gym)
+
+        for model in (Client, Gym, Membership, MembershipType, ReportJob, Transaction):
+            self.get_changelist(rf, admin_user, admin.site._registry[model])
+        assert not caplog.text
+
+    def test_warns_about_queries_per_row(self, rf, admin_user, settings, caplog):
+        class TransactionGymAdmin(ListRelatedAdminMixin, admin.ModelAdmin):
+            list_display = ("amount", "client_gym")
+
+            def client_gym(self, obj):
+                return obj.client.gym
+
+        settings.DEBUG = True
+        TransactionFactory()
+
+        self.get_changelist(rf, admin_user, TransactionGymAdmin(Transaction, admin.site))
+        assert "TransactionGymAdmin: the 'client_gym' column ran 2 queries to display one row" in caplog.text
+
+        caplog.clear()
+        TransactionGymAdmin.client_gym.related_fields = ("client__gym",)
+        self.get_changelist(rf, admin_user, TransactionGymAdmin(Transaction, admin.site))
+        assert not caplog.text
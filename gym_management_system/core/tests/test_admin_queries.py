@@ -0,0 +1,74 @@
+"""
+Query-count budgets for the core admin pages.
+
+Every changelist and change form is rendered with a small and a large number of rows; the
+number of queries must not grow with the number of rows, so a list_display callable or an
+inline that queries per row fails here.
+"""
+from datetime import date, timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from gym_management_system.core.models import Client, Gym, Membership, MembershipType, ReportJob, Transaction
+
+pytestmark = pytest.mark.django_db
+
+MODELS = [Gym, Client, MembershipType, Membership, Transaction, ReportJob]
+
+
+def populate(n):
+    """Add ``n`` rows to every core table, half of the memberships going to the first client."""
+    start = date(2024, 1, 1)
+    gyms = Gym.objects.bulk_create(Gym(name=f"Gym {i}", address="Main street") for i in range(n))
+    types = MembershipType.objects.bulk_create(
+        MembershipType(name=f"Type {i}", duration_months=1, price=100) for i in range(n)
+    )
+    clients = Client.objects.bulk_create(Client(name=f"Client {i}", gym=gyms[i]) for i in range(n))
+    first_client = Client.objects.order_by("pk").first()
+    Membership.objects.bulk_create(
+        Membership(
+            client=first_client if i % 2 else clients[i],
+            membership_type=types[i],
+            start_date=start + timedelta(days=i),
+            end_date=start + timedelta(days=i + 30),
+        )
+        for i in range(n)
+    )
+    Transaction.objects.bulk_create(
+        Transaction(
+            client=clients[i], gym=gyms[i], transaction_type="income", amount=100, date=start + timedelta(days=i)
+        )
+        for i in range(n)
+    )
+    ReportJob.objects.bulk_create(ReportJob(kind="gym_pnl", gym=gyms[i]) for i in range(n))
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(context)
+
+
+def changelist_url(model):
+    return reverse(f"admin:core_{model._meta.model_name}_changelist")
+
+
+def change_url(model):
+    return reverse(f"admin:core_{model._meta.model_name}_change", args=[model.objects.order_by("pk").first().pk])
+
+
+@pytest.mark.parametrize("get_url", [changelist_url, change_url], ids=["changelist", "change"])
+@pytest.mark.parametrize("model", MODELS, ids=[model._meta.model_name for model in MODELS])
+def test_query_count_does_not_grow_with_rows(admin_client, model, get_url):
+    populate(10)
+    admin_client.get(get_url(model))  # warm up the session and content type caches
+    small = count_queries(admin_client, get_url(model))
+
+    populate(490)
+    large = count_queries(admin_client, get_url(model))
+
+    assert large == small
@@ -0,0 +1,197 @@
+import json
+from datetime import date, timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import Sum
+from django.utils import timezone
+
+from gym_management_system.core import partitions
+from gym_management_system.core.models import Client, Gym, GymDailyTotal, Membership, Transaction
+
+from .factories import ClientFactory, GymFactory, MembershipFactory, TransactionFactory
+
+pytestmark = pytest.mark.django_db
+
+
+class TestUpdateMembershipStates:
+    def test_sweep(self):
+        today = timezone.now().date()
+        client = MembershipFactory(end_date=today + timedelta(days=1)).client
+
+        call_command("update_membership_states", "--date", (today + timedelta(days=2)).isoformat())
+
+        client.refresh_from_db()
+        assert client.membership_state == "expired"
+
+    def test_backfill(self):
+        today = timezone.now().date()
+        active = MembershipFactory(end_date=today + timedelta(days=30)).client
+        expired = MembershipFactory(end_date=today - timedelta(days=30)).client
+        no_membership = ClientFactory()
+        # simulate rows written before the summary existed
+        Client.objects.update(membership_end_date=None, membership_state="no_membership")
+
+        call_command("update_membership_states", "--backfill", "--batch-size", "2")
+
+        states = dict(Client.objects.values_list("pk", "membership_state"))
+        assert states == {active.pk: "active", expired.pk: "expired", no_membership.pk: "no_membership"}
+
+
+class TestRebuildDailyTotals:
+    def test_rebuild(self):
+        gym = TransactionFactory(amount=100).client.gym
+        other_gym = TransactionFactory(amount=200).client.gym
+        GymDailyTotal.objects.all().delete()
+
+        call_command("rebuild_daily_totals", "--gym", str(gym.pk))
+
+        assert gym.total_income() == 100
+        assert other_gym.total_income() == 0
+
+
+class TestRebuildClientBalances:
+    def test_rebuild(self):
+        client = TransactionFactory(amount=100).client
+        Client.objects.update(income_total=0, current_balance=0)
+
+        call_command("rebuild_client_balances", "--batch-size", "1")
+
+        client.refresh_from_db()
+        assert client.balance() == 100
+
+
+class TestGenerateDataset:
+    def generate(self, *args):
+        """Run the command and return the rows it created."""
+        last_client = Client.objects.order_by("pk").last()
+        last_transaction = Transaction.objects.order_by("pk").last()
+        call_command(
+            "generate_dataset",
+            "--gyms=3",
+            "--clients=50",
+            "--transactions=400",
+            "--end-date=2024-06-30",
+            "--batch-size=20",
+            *args,
+            stdout=StringIO(),
+        )
+        clients = Client.objects.filter(pk__gt=last_client.pk if last_client else 0).order_by("pk")
+        transactions = Transaction.objects.filter(pk__gt=last_transaction.pk if last_transaction else 0)
+        return (
+            list(clients.values_list("name", "phone", "gym__name", "current_balance")),
+            list(transactions.order_by("pk").values_list("client__name", "transaction_type", "amount", "date")),
+        )
+
+    def test_creates_requested_scale(self):
+        call_command("generate_dataset", "--gyms=3", "--clients=50", "--transactions=400", stdout=StringIO())
+        assert Gym.objects.count() == 3
+        assert Client.objects.count() == 50
+        assert Transaction.objects.count() == 400
+        assert Membership.objects.exists()
+        assert GymDailyTotal.objects.aggregate(count=Sum("count"))["count"] == 400
+
+    def test_same_seed_same_data(self):
+        assert self.generate("--seed=1") == self.generate("--seed=1")
+        assert self.generate("--seed=1") != self.generate("--seed=2")
+
+    def test_copy(self):
+        assert self.generate("--seed=1", "--copy") == self.generate("--seed=1")
+
+
+class TestBenchmark:
+    def test_records_results(self, tmp_path):
+        TransactionFactory.create_batch(3)
+        output = tmp_path / "results.json"
+
+        call_command("benchmark", "--repeat=1", f"--output={output}", stdout=StringIO())
+
+        results = json.loads(output.read_text())["results"]["current"]
+        assert results["statistics_query"]["queries"] == 1
+        assert set(results) >= {"client_membership_status", "client_balance", "gym_balance"}
+
+    def test_fails_on_regression(self, tmp_path):
+        TransactionFactory.create_batch(3)
+        baseline = tmp_path / "baseline.json"
+        call_command("benchmark", "--repeat=1", f"--output={baseline}", stdout=StringIO())
+        data = json.loads(baseline.read_text())
+        data["results"]["current"]["gym_balance"]["queries"] = 0
+        baseline.write_text(json.dumps(data))
+
+        with pytest.raises(CommandError, match="current/gym_balance"):
+            call_command(
+                "benchmark",
+                "--repeat=1",
+                f"--output={tmp_path / 'results.json'}",
+                f"--baseline={baseline}",
+                "--tolerance=1000",
+                stdout=StringIO(),
+            )
+
+
+class TestCreateTransactionPartitions:
+    def partitions(self):
+        return [name for name, _from, _to in partitions.get_partitions(connection)]
+
+    def test_creates_the_coming_periods_once(self):
+        today = date(2040, 11, 15)
+        stdout = StringIO()
+
+        call_command("create_transaction_partitions", "--date", today.isoformat(), "--months", "3", stdout=stdout)
+        call_command("create_transaction_partitions", "--date", today.isoformat(), "--months", "3", stdout=stdout)
+
+        # the partitions take every date until 2041-02-14
+        assert self.partitions()[-4:] == [
+            "core_transaction_p2040_11",
+            "core_transaction_p2040_12",
+            "core_transaction_p2041_01",
+            "core_transaction_p2041_02",
+        ]
+        assert "Created 4 partitions." in stdout.getvalue()
+        assert "Created 0 partitions." in stdout.getvalue()
+
+    def test_yearly_partitions(self, settings):
+        settings.TRANSACTION_PARTITION_INTERVAL = "year"
+
+        call_command("create_transaction_partitions", "--date", "2050-06-01", "--months", "12", stdout=StringIO())
+
+        assert self.partitions()[-2:] == ["core_transaction_p2050", "core_transaction_p2051"]
+
+    def test_start_moves_transactions_out_of_the_default_partition(self):
+        payment = TransactionFactory(date=date(2001, 5, 20), amount=40)
+        stderr = StringIO()
+        call_command("create_transaction_partitions", stdout=StringIO(), stderr=stderr)
+        assert "1 transactions are dated outside every partition" in stderr.getvalue()
+
+        call_command("create_transaction_partitions", "--start", "2001-05-01", stdout=StringIO())
+
+        assert "core_transaction_p2001_05" in self.partitions()
+        assert partitions.count_default_rows(connection) == 0
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT id, amount FROM core_transaction_p2001_05")
+            assert cursor.fetchall() == [(payment.pk, 40)]
+
+
+class TestImportCsv:
+    def test_import_with_error_report(self, tmp_path):
+        gym = GymFactory(name="Downtown")
+        path = tmp_path / "clients.csv"
+        path.write_text("name,phone,gym\nSami Haddad,0591234567,Downtown\nLina Khalil,,Uptown\n")
+        report = tmp_path / "errors.csv"
+        stdout = StringIO()
+
+        call_command("import_csv", "clients", str(path), "--error-report", str(report), stdout=stdout)
+
+        assert list(Client.objects.filter(gym=gym).values_list("name", flat=True)) == ["Sami Haddad"]
+        assert "Imported 1 clients, skipped 1 invalid rows." in stdout.getvalue()
+        lines = report.read_text().splitlines()
+        assert lines[0] == "line,errors,name,phone,gym"
+        assert lines[1].startswith("3,") and lines[1].endswith(",Lina Khalil,,Uptown")
+
+    def test_missing_columns(self, tmp_path):
+        path = tmp_path / "transactions.csv"
+        path.write_text("client,amount\n1,10\n")
+        with pytest.raises(CommandError, match="transaction_type"):
+            call_command("import_csv", "transactions", str(path))
@@ -0,0 +1,239 @@
+import csv
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .factories import ClientFactory, GymFactory, MembershipFactory, MembershipTypeFactory, TransactionFactory
+
+pytestmark = pytest.mark.django_db
+
+
+class TestClientViewSet:
+    url = reverse("api:client-list")
+
+    def test_list(self, admin_client):
+        today = timezone.now().date()
+        client = MembershipFactory(end_date=today + timedelta(days=3)).client
+        TransactionFactory(client=client, amount=150)
+
+        response = admin_client.get(self.url)
+
+        assert response.status_code == 200
+        [result] = response.json()["results"]
+        assert result["id"] == client.pk
+        assert result["membership_status"] == "expiring_soon"
+        assert result["balance"] == "150.00"
+
+    def test_requires_staff(self, client, user):
+        client.force_login(user)
+        assert client.get(self.url).status_code == 403
+
+    def test_create_with_formatted_phone_number(self, admin_client):
+        gym = GymFactory()
+
+        response = admin_client.post(self.url, {"name": "Sami Haddad", "phone": "+970 59-123-4567", "gym": gym.pk})
+
+        assert response.status_code == 201
+        assert response.json()["phone"] == "970591234567"
+        response = admin_client.post(
+            self.url, {"name": "Lina Khalil", "phone": "+970 59-123-4567-8901", "gym": gym.pk}
+        )
+        assert response.status_code == 400
+        assert "phone" in response.json()
+
+    def test_cursor_pagination(self, admin_client):
+        clients = ClientFactory.create_batch(5)
+
+        first = admin_client.get(self.url, data={"page_size": 3}).json()
+        second = admin_client.get(first["next"]).json()
+
+        assert [c["id"] for c in first["results"] + second["results"]] == [c.pk for c in clients]
+        assert second["next"] is None
+
+    def test_query_count_does_not_grow_with_rows(self, admin_client):
+        MembershipFactory.create_batch(3)
+        admin_client.get(self.url)
+        with CaptureQueriesContext(connection) as small:
+            admin_client.get(self.url)
+        MembershipFactory.create_batch(30)
+        with CaptureQueriesContext(connection) as large:
+            admin_client.get(self.url)
+        assert len(large) == len(small)
+
+    def test_filter(self, admin_client):
+        today = timezone.now().date()
+        expired = MembershipFactory(end_date=today - timedelta(days=1)).client
+        MembershipFactory(end_date=today + timedelta(days=30))
+
+        response = admin_client.get(self.url, data={"status": "expired", "gym": expired.gym_id})
+
+        assert [c["id"] for c in response.json()["results"]] == [expired.pk]
+
+    def test_search(self, admin_client):
+        client = ClientFactory(name="Ahmad Khalil", phone="0599123456")
+        ClientFactory(name="Sami Taha", phone="0561111111")
+
+        for term in ("khalil", "+0599 12"):
+            response = admin_client.get(self.url, data={"q": term})
+            assert [c["id"] for c in response.json()["results"]] == [client.pk]
+
+    def test_invalid_filter(self, admin_client):
+        assert admin_client.get(self.url, data={"gym": "abc"}).status_code == 400
+
+    def test_export(self, admin_client):
+        client = TransactionFactory(amount=150).client
+        other = ClientFactory()
+
+        response = admin_client.get(reverse("api:client-export"), data={"gym": client.gym_id})
+
+        assert response["Content-Type"] == "text/csv"
+        rows = list(csv.reader(line.decode() for line in response.streaming_content))
+        assert rows[0][:4] == ["id", "name", "phone", "gym"]
+        assert [row[0] for row in rows[1:]] == [str(client.pk)]
+        assert rows[1][-1] == "150.00"
+        assert str(other.pk) not in {row[0] for row in rows}
+
+
+class TestTransactionViewSet:
+    url = reverse("api:transaction-list")
+
+    def test_create_updates_balance(self, admin_client):
+        client = ClientFactory()
+
+        response = admin_client.post(
+            self.url,
+            data={"transaction_type": "income", "amount": "25.00", "date": "2024-01-01", "client": client.pk},
+        )
+
+        assert response.status_code == 201
+        client.refresh_from_db()
+        assert client.balance() == 25
+
+    def test_filter_by_client(self, admin_client):
+        transaction = TransactionFactory()
+        TransactionFactory()
+
+        response = admin_client.get(self.url, data={"client": transaction.client_id})
+
+        assert [t["id"] for t in response.json()["results"]] == [transaction.pk]
+
+    def test_gym_expense(self, admin_client):
+        gym = GymFactory()
+        TransactionFactory()
+
+        response = admin_client.post(
+            self.url, data={"transaction_type": "expense", "amount": "500", "date": "2024-01-01", "gym": gym.pk}
+        )
+
+        assert response.status_code == 201
+        assert gym.total_expenses() == 500
+        expense_id = response.json()["id"]
+        response = admin_client.get(self.url, data={"gym": gym.pk})
+        assert [t["id"] for t in response.json()["results"]] == [expense_id]
+
+    def test_gym_must_be_the_clients(self, admin_client):
+        response = admin_client.post(
+            self.url,
+            data={
+                "transaction_type": "income",
+                "amount": "25",
+                "date": "2024-01-01",
+                "client": ClientFactory().pk,
+                "gym": GymFactory().pk,
+            },
+        )
+
+        assert response.status_code == 400
+        assert "gym" in response.json()
+
+    def test_export_streams(self, admin_client, django_assert_num_queries):
+        transactions = TransactionFactory.create_batch(5)
+
+        response = admin_client.get(reverse("api:transaction-export"))
+
+        content = iter(response.streaming_content)
+        # the header goes out before the export query runs
+        with django_assert_num_queries(0):
+            assert next(content).decode().startswith("id,date,type,amount")
+        rows = list(csv.reader(line.decode() for line in content))
+        assert [row[0] for row in rows] == [str(t.pk) for t in transactions]
+        assert rows[0][-2:] == [transactions[0].client.name, transactions[0].client.gym.name]
+
+    def test_production_workers_do_not_cut_exports_short(self):
+        # a sync worker is killed once one request outlasts the timeout; gthread workers aren't
+        from config import gunicorn
+
+        assert gunicorn.worker_class == "gthread"
+        assert gunicorn.threads > 1
+
+
+class TestMembershipViewSet:
+    url = reverse("api:membership-list")
+
+    def test_filter_by_gym(self, admin_client):
+        membership = MembershipFactory()
+        MembershipFactory()
+
+        response = admin_client.get(self.url, data={"gym": membership.client.gym_id})
+
+        assert response.status_code == 200
+        assert [m["id"] for m in response.json()["results"]] == [membership.pk]
+
+    def test_create_updates_status(self, admin_client):
+        membership = MembershipFactory()
+        today = timezone.now().date()
+
+        response = admin_client.post(
+            self.url,
+            data={
+                "client": membership.client_id,
+                "membership_type": membership.membership_type_id,
+                "start_date": today.isoformat(),
+                "end_date": (today + timedelta(days=60)).isoformat(),
+            },
+        )
+
+        assert response.status_code == 201
+        detail = admin_client.get(reverse("api:client-detail", args=[membership.client_id])).json()
+        assert detail["membership_status"] == "active"
+
+    def test_end_before_start(self, admin_client):
+        membership = MembershipFactory()
+        response = admin_client.post(
+            self.url,
+            data={
+                "client": membership.client_id,
+                "membership_type": membership.membership_type_id,
+                "start_date": "2024-02-01",
+                "end_date": "2024-01-01",
+            },
+        )
+        assert response.status_code == 400
+
+
+class TestMembershipTypeViewSet:
+    url = reverse("api:membershiptype-statistics")
+
+    def test_statistics(self, admin_client):
+        membership_type = MembershipTypeFactory(name="Monthly", price=50)
+        MembershipFactory.create_batch(2, membership_type=membership_type)
+
+        response = admin_client.get(self.url, data={"start_date": timezone.now().date().isoformat()})
+
+        assert response.status_code == 200
+        [row] = response.json()
+        assert row["id"] == membership_type.pk
+        assert (row["active_members"], row["total_members"], row["memberships_sold"]) == (2, 2, 2)
+        assert row["revenue"] == "100.00"
+
+    def test_invalid_period(self, admin_client):
+        response = admin_client.get(self.url, data={"start_date": "2024-03-01", "end_date": "2024-02-01"})
+        assert response.status_code == 400
+
+    def test_requires_staff(self, client, user):
+        client.force_login(user)
+        assert client.get(self.url).status_code == 403
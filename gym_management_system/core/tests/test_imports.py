@@ -0,0 +1,151 @@
+import io
+from datetime import date
+
+import pytest
+from django.core.exceptions import ValidationError
+
+from gym_management_system.core.imports import ClientImporter, MembershipImporter, TransactionImporter
+from gym_management_system.core.models import Client, GymDailyTotal, Membership, Transaction
+
+from .factories import ClientFactory, GymFactory, MembershipTypeFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def csv_file(*lines):
+    return io.StringIO("\n".join(lines) + "\n")
+
+
+class TestClientImporter:
+    def test_import(self):
+        gym = GymFactory(name="Downtown")
+        MembershipTypeFactory(name="Quarterly", duration_months=3)
+
+        importer = ClientImporter(batch_size=2).run(
+            csv_file(
+                "name,phone,gym,membership_type,membership_start_date",
+                "Sami Haddad,0591234567,downtown,,",
+                f"Lina Khalil,,{gym.pk},Quarterly,2024-01-15",
+                "Omar Saleh,0597654321,Downtown,quarterly,15-02-2024",
+            )
+        )
+
+        assert (importer.created, importer.error_count) == (3, 0)
+        clients = {client.name: client for client in Client.objects.filter(gym=gym)}
+        assert clients["Sami Haddad"].membership_state == "no_membership"
+        assert clients["Lina Khalil"].phone is None
+        assert clients["Lina Khalil"].membership_end_date == date(2024, 4, 14)
+        assert clients["Omar Saleh"].membership_end_date == date(2024, 5, 14)
+
+    def test_invalid_rows_are_reported(self):
+        GymFactory(name="Downtown")
+        errors = []
+
+        importer = ClientImporter(on_error=lambda line, row, message: errors.append((line, message))).run(
+            csv_file(
+                "name,phone,gym,membership_type,membership_start_date",
+                ",0591234567,Downtown,,",
+                "Sami Haddad,0591234567,Uptown,,",
+                "Lina Khalil,,Downtown,Yearly,2024-01-15",
+                "Omar Saleh,,Downtown,,",
+            )
+        )
+
+        assert (importer.created, importer.error_count) == (1, 3)
+        assert [line for line, message in errors] == [2, 3, 4]
+        assert errors[0][1].startswith("name:")
+        assert "Uptown" in errors[1][1]
+        assert importer.errors == errors
+
+    def test_formatted_phone_numbers(self):
+        GymFactory(name="Downtown")
+
+        importer = ClientImporter().run(
+            csv_file(
+                "name,phone,gym", "Sami Haddad,+970 59-123-4567,Downtown", "Lina Khalil,+970 59-123-4567-8901,Downtown"
+            )
+        )
+
+        assert (importer.created, importer.error_count) == (1, 1)
+        assert Client.objects.get().phone == "970591234567"
+        assert importer.errors[0][1].startswith("phone:")
+
+    def test_missing_columns(self):
+        with pytest.raises(ValidationError):
+            ClientImporter().run(csv_file("name,phone", "Sami Haddad,0591234567"))
+
+    def test_query_count_does_not_grow_with_rows(self, django_assert_max_num_queries):
+        GymFactory(name="Downtown")
+        MembershipTypeFactory(name="Monthly")
+        lines = [f"Client {i},,Downtown,Monthly,2024-01-01" for i in range(50)]
+
+        with django_assert_max_num_queries(12):
+            ClientImporter().run(csv_file("name,phone,gym,membership_type,membership_start_date", *lines))
+
+        assert Membership.objects.count() == 50
+
+
+class TestMembershipImporter:
+    def test_import(self):
+        client = ClientFactory()
+        MembershipTypeFactory(name="Monthly", duration_months=1)
+
+        importer = MembershipImporter().run(
+            csv_file(
+                "client,membership_type,start_date,end_date",
+                f"{client.pk},Monthly,2024-01-31,",
+                f"{client.pk},Monthly,2024-03-01,2024-03-15",
+                f"{client.pk + 1000},Monthly,2024-03-01,",
+                f"{client.pk},Monthly,2024-03-01,2024-02-01",
+            )
+        )
+
+        assert (importer.created, importer.error_count) == (2, 2)
+        assert set(Membership.objects.values_list("start_date", "end_date")) == {
+            (date(2024, 1, 31), date(2024, 2, 28)),
+            (date(2024, 3, 1), date(2024, 3, 15)),
+        }
+        client.refresh_from_db()
+        assert client.membership_end_date == date(2024, 3, 15)
+
+
+class TestTransactionImporter:
+    def test_import_updates_derived_data(self):
+        client = ClientFactory()
+
+        importer = TransactionImporter().run(
+            csv_file(
+                "client,transaction_type,amount,date,description",
+                f"{client.pk},income,150.00,2024-01-01,Monthly",
+                f"{client.pk},income,50,2024-01-01,Shop",
+                f"{client.pk},expense,20,2024-01-02,Refund",
+                ",expense,500,2024-01-02,Rent",
+                f"{client.pk},gift,20,2024-01-02,",
+            )
+        )
+
+        assert (importer.created, importer.error_count) == (4, 1)
+        assert Transaction.objects.filter(client=None).count() == 1
+        client.refresh_from_db()
+        assert (client.income_total, client.expenses_total, client.current_balance) == (200, 20, 180)
+        totals = set(GymDailyTotal.objects.values_list("date", "transaction_type", "total", "count"))
+        assert totals == {(date(2024, 1, 1), "income", 200, 2), (date(2024, 1, 2), "expense", 20, 1)}
+
+    def test_import_gym_transactions(self):
+        client = ClientFactory()
+        gym = GymFactory(name="Downtown")
+
+        importer = TransactionImporter().run(
+            csv_file(
+                "client,gym,transaction_type,amount,date,description",
+                ",downtown,expense,500,2024-01-02,Rent",
+                f",{gym.pk},expense,100,2024-01-02,Repairs",
+                f"{client.pk},,income,50,2024-01-02,Shop",
+                ",Uptown,expense,20,2024-01-02,",
+            )
+        )
+
+        assert (importer.created, importer.error_count) == (3, 1)
+        assert Transaction.objects.get(description="Shop").gym_id == client.gym_id
+        totals = set(GymDailyTotal.objects.filter(gym=gym).values_list("date", "transaction_type", "total", "count"))
+        assert totals == {(date(2024, 1, 2), "expense", 600, 2)}
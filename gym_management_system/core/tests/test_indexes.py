@@ -0,0 +1,125 @@
+"""
+EXPLAIN-based checks that the hot queries on the large core tables use an index, or
+read only the transaction partitions of their period.
+
+The tables are filled with enough generated rows, and analyzed, for the planner to
+prefer a sequential scan whenever no suitable index exists.
+"""
+import re
+from datetime import date, timedelta
+
+import pytest
+from django.db import connection
+from django.db.models import Max, Sum
+
+from gym_management_system.core import partitions
+from gym_management_system.core.models import Client, Membership, Transaction
+
+from .factories import ClientFactory, GymFactory, MembershipTypeFactory
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.skipif(connection.vendor != "postgresql", reason="the plans checked are PostgreSQL plans"),
+]
+
+NUM_CLIENTS = 2000
+# the client search tests need a table too large to just scan
+NUM_SEARCHED_CLIENTS = 20000
+TRANSACTIONS_PER_CLIENT = 10
+START = date(2020, 1, 1)
+
+
+@pytest.fixture
+def dataset():
+    partitions.create_partitions(connection, START, START + timedelta(days=1500))
+    gym = GymFactory()
+    membership_type = MembershipTypeFactory()
+    ClientFactory.create_batch(5, gym=gym)
+    clients = Client.objects.bulk_create(Client(name=f"Client {i}", gym=gym) for i in range(NUM_CLIENTS))
+    Membership.objects.bulk_create(
+        Membership(
+            client=client,
+            membership_type=membership_type,
+            start_date=START + timedelta(days=i % 1500),
+            end_date=START + timedelta(days=i % 1500 + 30),
+        )
+        for i, client in enumerate(clients)
+    )
+    Transaction.objects.bulk_create(
+        Transaction(
+            client=client,
+            gym=gym,
+            transaction_type="income" if j % 3 else "expense",
+            amount=10,
+            date=START + timedelta(days=(i * TRANSACTIONS_PER_CLIENT + j) % 1500),
+        )
+        for i, client in enumerate(clients)
+        for j in range(TRANSACTIONS_PER_CLIENT)
+    )
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE core_client, core_membership, core_transaction")
+    return clients
+
+
+@pytest.fixture
+def searched_clients():
+    gym = GymFactory()
+    Client.objects.bulk_create(
+        Client(name=f"Client {i:x}", phone=f"059{i:07d}", gym=gym) for i in range(NUM_SEARCHED_CLIENTS)
+    )
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE core_client")
+
+
+def assert_no_seq_scan(queryset, tables=("core_transaction", "core_membership")):
+    plan = queryset.explain()
+    scanned = re.findall(r"Seq Scan on (\w+)", plan)
+    # the empty partitions of a partitioned table cost nothing to scan
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT relname FROM pg_class WHERE relname = ANY(%s) AND reltuples > 0", [scanned])
+        scanned = {name for (name,) in cursor.fetchall()}
+    for table in tables:
+        assert not {name for name in scanned if name == table or name.startswith(f"{table}_")}, plan
+
+
+def assert_reads_partitions(queryset, expected):
+    plan = queryset.explain()
+    assert sorted(set(re.findall(r" on (core_transaction_\w+)", plan))) == expected, plan
+
+
+class TestIndexes:
+    def test_client_totals_by_type(self, dataset):
+        client = dataset[len(dataset) // 2]
+        totals = Transaction.objects.filter(client=client, transaction_type="income")
+        assert_no_seq_scan(totals.values("client").annotate(Sum("amount")))
+
+    def test_transactions_in_date_range(self, dataset):
+        assert_reads_partitions(
+            Transaction.objects.filter(date__range=(date(2021, 3, 1), date(2021, 3, 7)), transaction_type="income")
+            .values("transaction_type")
+            .annotate(Sum("amount")),
+            ["core_transaction_p2021_03"],
+        )
+
+    def test_gym_transactions_in_date_range(self, dataset):
+        assert_reads_partitions(
+            Transaction.objects.filter(gym=dataset[0].gym_id, date__range=(date(2021, 2, 20), date(2021, 3, 7)))
+            .values("date", "transaction_type")
+            .annotate(Sum("amount")),
+            ["core_transaction_p2021_02", "core_transaction_p2021_03"],
+        )
+
+    def test_memberships_ending_in_range(self, dataset):
+        assert_no_seq_scan(
+            Membership.objects.filter(end_date__range=(date(2021, 3, 1), date(2021, 3, 7))).values("client")
+        )
+
+    def test_client_latest_end_date(self, dataset):
+        client = dataset[len(dataset) // 2]
+        assert_no_seq_scan(Membership.objects.filter(client=client).values("client").annotate(Max("end_date")))
+
+    def test_client_name_search(self, searched_clients):
+        assert_no_seq_scan(Client.objects.search("4e1f"), tables=["core_client"])
+
+    def test_client_phone_search(self, searched_clients):
+        assert_no_seq_scan(Client.objects.search("0590 0123"), tables=["core_client"])
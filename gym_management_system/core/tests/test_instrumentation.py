@@ -0,0 +1,56 @@
+import logging
+
+import pytest
+from django.urls import reverse
+
+from gym_management_system.core import caching
+
+from .factories import MembershipFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def request_metrics(settings):
+    settings.MIDDLEWARE = ["gym_management_system.core.instrumentation.RequestMetricsMiddleware", *settings.MIDDLEWARE]
+
+
+def server_timing(response):
+    return dict(metric.split(";", 1) for metric in response["Server-Timing"].split(", "))
+
+
+def test_client_changelist(admin_client, caplog, django_assert_num_queries):
+    MembershipFactory.create_batch(3)
+
+    with caplog.at_level(logging.INFO, logger="gym_management_system.core.instrumentation"):
+        with django_assert_num_queries(7) as captured:
+            response = admin_client.get(reverse("admin:core_client_changelist"))
+
+    [record] = caplog.records
+    metrics = record.request_metrics
+    assert metrics["view"] == "core_client_changelist"
+    assert metrics["queries"] == len(captured)
+    assert metrics["template_ms"] > 0
+    assert "view=core_client_changelist method=GET status=200" in record.getMessage()
+    timing = server_timing(response)
+    assert timing["db"].endswith(f'desc="{metrics["queries"]} queries"')
+    assert timing["total"].endswith('desc="core_client_changelist"')
+
+
+def test_cache_lookups(admin_client, caplog):
+    with caplog.at_level(logging.INFO, logger="gym_management_system.core.instrumentation"):
+        admin_client.get(reverse("admin:gym-statistics"))
+        admin_client.get(reverse("admin:gym-statistics"))
+
+    first, second = (record.request_metrics for record in caplog.records)
+    assert (first["cache_hits"], first["cache_misses"]) == (0, 1)
+    assert (second["cache_hits"], second["cache_misses"]) == (1, 0)
+
+
+def test_no_header_for_anonymous_users(client):
+    response = client.get(reverse("admin:login"))
+    assert "Server-Timing" not in response
+
+
+def test_cache_lookups_outside_requests_are_ignored():
+    assert caching.get_or_compute("test", "key", lambda: 1, timeout=60) == 1
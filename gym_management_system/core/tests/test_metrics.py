@@ -0,0 +1,86 @@
+import subprocess
+import sys
+
+import pytest
+from django.conf import settings
+from django.urls import reverse
+from django.utils import timezone
+from prometheus_client import generate_latest
+from prometheus_client.parser import text_string_to_metric_families
+
+from gym_management_system.core.metrics import get_registry
+
+from .factories import ClientFactory, GymFactory, MembershipFactory
+
+pytestmark = pytest.mark.django_db
+
+url = reverse("metrics")
+
+
+def samples(text):
+    return {
+        (sample.name, tuple(sorted(sample.labels.items()))): sample.value
+        for family in text_string_to_metric_families(text)
+        for sample in family.samples
+    }
+
+
+def test_business_gauges(admin_client):
+    gym = GymFactory(name="Downtown")
+    MembershipFactory.create_batch(2, client__gym=gym, end_date=timezone.now().date())
+    ClientFactory(gym=gym)
+
+    response = admin_client.get(url)
+
+    assert response.status_code == 200
+    assert response["Content-Type"].startswith("text/plain")
+    assert (
+        samples(response.content.decode())[("gym_active_memberships", (("gym", "Downtown"), ("gym_id", str(gym.pk))))]
+        == 2
+    )
+
+
+def test_request_metrics(admin_client, settings):
+    settings.MIDDLEWARE = ["gym_management_system.core.instrumentation.RequestMetricsMiddleware", *settings.MIDDLEWARE]
+    key = ("gym_request_duration_seconds_count", (("method", "GET"), ("view", "core_client_changelist")))
+    before = samples(admin_client.get(url).content.decode()).get(key, 0)
+
+    admin_client.get(reverse("admin:core_client_changelist"))
+
+    assert samples(admin_client.get(url).content.decode())[key] == before + 1
+
+
+def test_token(client, settings):
+    settings.METRICS_TOKEN = "secret"
+    assert client.get(url).status_code == 403
+    assert client.get(url, HTTP_AUTHORIZATION="Bearer wrong").status_code == 403
+    assert client.get(url, HTTP_AUTHORIZATION="Bearer secret").status_code == 200
+
+
+def test_no_token_configured(client, settings):
+    settings.METRICS_TOKEN = ""
+    assert client.get(url, HTTP_AUTHORIZATION="Bearer ").status_code == 403
+
+
+def test_aggregates_across_worker_processes(tmp_path, monkeypatch):
+    # two "workers", each serving requests in its own process
+    worker = (
+        "from gym_management_system.core.metrics import observe_request, observe_cache_lookup\n"
+        "for _ in range({requests}):\n"
+        "    observe_request('core_client_changelist', 'GET', 0.2, 7)\n"
+        "observe_cache_lookup(True)\n"
+    )
+    env = {"PROMETHEUS_MULTIPROC_DIR": str(tmp_path)}
+    for requests in (2, 3):
+        command = [sys.executable, "-c", worker.format(requests=requests)]
+        subprocess.run(command, env=env, check=True, cwd=settings.BASE_DIR)
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+
+    values = samples(generate_latest(get_registry()).decode())
+
+    labels = (("method", "GET"), ("view", "core_client_changelist"))
+    assert values[("gym_request_duration_seconds_count", labels)] == 5
+    assert values[("gym_request_duration_seconds_sum", labels)] == pytest.approx(1.0)
+    assert values[("gym_cache_lookups_total", (("result", "hit"),))] == 2
+    per_worker = sorted(value for (name, _), value in values.items() if name == "gym_worker_requests")
+    assert per_worker == [2, 3]
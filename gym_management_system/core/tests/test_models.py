@@ -0,0 +1,405 @@
+import threading
+from datetime import date, timedelta
+from importlib import import_module
+
+import pytest
+from django.apps import apps
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.utils import timezone
+
+from gym_management_system.core.models import (
+    Client,
+    Gym,
+    GymDailyTotal,
+    Membership,
+    Transaction,
+    add_months,
+    normalize_phone,
+)
+
+from .factories import ClientFactory, GymFactory, MembershipFactory, MembershipTypeFactory, TransactionFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def client_with_membership_ending(days):
+    """Create a client whose only membership ends ``days`` from today (None: no membership)."""
+    client = ClientFactory()
+    if days is not None:
+        today = timezone.now().date()
+        MembershipFactory(client=client, start_date=today - timedelta(days=30), end_date=today + timedelta(days=days))
+    return client
+
+
+class TestClientMembershipStatus:
+    @pytest.mark.parametrize(
+        "days, expected",
+        [
+            (None, "no_membership"),
+            (-1, "expired"),
+            (0, "expiring_soon"),
+            (7, "expiring_soon"),
+            (8, "active"),
+        ],
+    )
+    def test_status(self, days, expected):
+        client = client_with_membership_ending(days)
+        assert client.membership_status()[0] == expected
+        assert Client.objects.with_membership_status().get(pk=client.pk).membership_status_code == expected
+
+    def test_latest_membership_wins(self):
+        client = client_with_membership_ending(3)
+        today = timezone.now().date()
+        MembershipFactory(client=client, start_date=today + timedelta(days=4), end_date=today + timedelta(days=60))
+
+        annotated = Client.objects.with_membership_status().get(pk=client.pk)
+        assert annotated.latest_end_date == today + timedelta(days=60)
+        assert annotated.membership_status()[0] == "active"
+
+    def test_annotated_client_does_not_query(self, django_assert_num_queries):
+        client = client_with_membership_ending(3)
+        annotated = Client.objects.with_membership_status().get(pk=client.pk)
+        with django_assert_num_queries(0):
+            annotated.membership_status()
+            annotated.last_membership_day()
+
+    def test_last_membership_day(self):
+        assert client_with_membership_ending(-1).last_membership_day() is None
+        today = timezone.now().date() + timedelta(days=10)
+        assert client_with_membership_ending(10).last_membership_day() == today.strftime("%-d-%-m-%Y")
+
+
+class TestClientMembershipSummary:
+    def test_membership_save_updates_summary(self):
+        client = client_with_membership_ending(3)
+        client.refresh_from_db()
+        today = timezone.now().date()
+        assert client.membership_end_date == today + timedelta(days=3)
+        assert client.membership_state == "expiring_soon"
+        assert client.membership_state_changes_on == today + timedelta(days=4)
+
+    def test_membership_delete_updates_summary(self):
+        client = client_with_membership_ending(30)
+        client.membership_set.get().delete()
+        client.refresh_from_db()
+        assert client.membership_end_date is None
+        assert client.membership_state == "no_membership"
+        assert client.membership_state_changes_on is None
+
+    def test_moving_membership_to_another_client(self):
+        old_client, new_client = client_with_membership_ending(30), ClientFactory()
+        membership = old_client.membership_set.get()
+        membership.client = new_client
+        membership.save()
+        old_client.refresh_from_db()
+        new_client.refresh_from_db()
+        assert (old_client.membership_state, old_client.membership_end_date) == ("no_membership", None)
+        assert new_client.membership_state == "active"
+        assert new_client.membership_end_date == timezone.now().date() + timedelta(days=30)
+
+    def test_sweep_membership_states(self):
+        client = client_with_membership_ending(10)
+        client.refresh_from_db()
+        assert client.membership_state == "active"
+        assert client.membership_state_changes_on == timezone.now().date() + timedelta(days=3)
+
+        today = timezone.now().date()
+        assert Client.objects.sweep_membership_states(today=today + timedelta(days=2)) == 0
+        assert Client.objects.sweep_membership_states(today=today + timedelta(days=3)) == 1
+        client.refresh_from_db()
+        assert client.membership_state == "expiring_soon"
+
+        assert Client.objects.sweep_membership_states(today=today + timedelta(days=11)) == 1
+        client.refresh_from_db()
+        assert client.membership_state == "expired"
+        assert client.membership_state_changes_on is None
+
+    def test_expiring_and_lapsed(self):
+        today = timezone.now().date()
+        expiring = client_with_membership_ending(5)
+        lapsed = client_with_membership_ending(-5)
+        client_with_membership_ending(30)
+        ClientFactory()
+
+        assert list(Client.objects.expiring(days=7)) == [expiring]
+        assert list(Client.objects.lapsed(since=today - timedelta(days=7))) == [lapsed]
+
+
+class TestGymFinancials:
+    @pytest.fixture
+    def gym(self):
+        gym = GymFactory()
+        for client in ClientFactory.create_batch(3, gym=gym):
+            TransactionFactory.create_batch(2, client=client, transaction_type="income", amount=50)
+            TransactionFactory(client=client, transaction_type="expense", amount=20)
+        # transactions of another gym must not be counted
+        TransactionFactory(transaction_type="income", amount=1000)
+        return gym
+
+    def test_methods(self, gym):
+        assert gym.total_clients() == 3
+        assert gym.total_income() == 300
+        assert gym.total_expenses() == 60
+        assert gym.balance() == 240
+
+    def test_with_financials(self, gym, django_assert_num_queries):
+        with django_assert_num_queries(1):
+            annotated = Gym.objects.with_financials().get(pk=gym.pk)
+        with django_assert_num_queries(0):
+            assert annotated.total_clients() == 3
+            assert annotated.total_income() == 300
+            assert annotated.total_expenses() == 60
+            assert annotated.balance() == 240
+
+    def test_with_financials_empty_gym(self):
+        gym = Gym.objects.with_financials().get(pk=GymFactory().pk)
+        assert (gym.client_count, gym.income, gym.expenses, gym.net_balance) == (0, 0, 0, 0)
+
+
+class TestGymDailyTotal:
+    def totals(self, gym):
+        return {
+            (row.date, row.transaction_type): (row.total, row.count)
+            for row in GymDailyTotal.objects.filter(gym=gym).exclude(count=0)
+        }
+
+    def test_transaction_create_update_delete(self):
+        today = timezone.now().date()
+        client = ClientFactory()
+        first = TransactionFactory(client=client, amount=100, date=today)
+        TransactionFactory(client=client, amount=50, date=today)
+        assert self.totals(client.gym) == {(today, "income"): (150, 2)}
+
+        first.amount = 70
+        first.transaction_type = "expense"
+        first.save()
+        assert self.totals(client.gym) == {(today, "income"): (50, 1), (today, "expense"): (70, 1)}
+
+        first.delete()
+        assert self.totals(client.gym) == {(today, "income"): (50, 1)}
+
+    def test_transaction_without_client_or_gym_is_ignored(self):
+        TransactionFactory(client=None)
+        assert not GymDailyTotal.objects.exists()
+
+    def test_gym_expense_without_client(self):
+        today = timezone.now().date()
+        gym = GymFactory()
+        TransactionFactory(client=None, gym=gym, transaction_type="expense", amount=500, date=today)
+        TransactionFactory(client=ClientFactory(gym=gym), amount=100, date=today)
+        assert self.totals(gym) == {(today, "income"): (100, 1), (today, "expense"): (500, 1)}
+        assert Gym.objects.with_financials().get(pk=gym.pk).net_balance == -400
+
+        GymDailyTotal.objects.all().delete()
+        GymDailyTotal.objects.rebuild()
+        assert self.totals(gym) == {(today, "income"): (100, 1), (today, "expense"): (500, 1)}
+
+    def test_client_moving_gym_moves_totals(self):
+        payment = TransactionFactory(amount=100)
+        client = payment.client
+        old_gym, new_gym = client.gym, GymFactory()
+        client.gym = new_gym
+        client.save()
+        assert old_gym.total_income() == 0
+        assert new_gym.total_income() == 100
+        payment.refresh_from_db()
+        assert payment.gym == new_gym
+
+    def test_rebuild(self):
+        today = timezone.now().date()
+        client = TransactionFactory(amount=100, date=today).client
+        GymDailyTotal.objects.update(total=1)
+
+        assert GymDailyTotal.objects.rebuild() == 1
+        assert self.totals(client.gym) == {(today, "income"): (100, 1)}
+
+
+class TestTransactionGym:
+    def test_gym_is_the_clients_gym(self):
+        client = ClientFactory()
+        payment = TransactionFactory(client=client, gym=GymFactory())
+        assert payment.gym == client.gym
+
+    def test_clean_rejects_another_gym(self):
+        payment = TransactionFactory.build(client=ClientFactory(), gym=GymFactory())
+        with pytest.raises(ValidationError) as error:
+            payment.clean()
+        assert "gym" in error.value.message_dict
+
+    def test_backfill(self):
+        backfill = import_module("gym_management_system.core.migrations.0011_transaction_gym")
+        payment = TransactionFactory()
+        expense = TransactionFactory(client=None)
+        Transaction.objects.update(gym=None)
+
+        with connection.schema_editor() as schema_editor:
+            backfill.backfill_transaction_gyms(apps, schema_editor)
+
+        assert Transaction.objects.get(pk=payment.pk).gym_id == payment.client.gym_id
+        assert Transaction.objects.get(pk=expense.pk).gym_id is None
+
+
+class TestClientBalance:
+    def test_transaction_writes_update_totals(self):
+        client = ClientFactory()
+        payment = TransactionFactory(client=client, transaction_type="income", amount=100)
+        TransactionFactory(client=client, transaction_type="expense", amount=30)
+        client.refresh_from_db()
+        assert (client.total_income(), client.total_expenses(), client.balance()) == (100, 30, 70)
+
+        payment.amount = 80
+        payment.save()
+        client.refresh_from_db()
+        assert client.balance() == 50
+
+        payment.delete()
+        client.refresh_from_db()
+        assert (client.total_income(), client.total_expenses(), client.balance()) == (0, 30, -30)
+
+    def test_moving_transaction_to_another_client(self):
+        payment = TransactionFactory(amount=100)
+        old_client, new_client = payment.client, ClientFactory()
+        payment.client = new_client
+        payment.save()
+        old_client.refresh_from_db()
+        new_client.refresh_from_db()
+        assert (old_client.balance(), new_client.balance()) == (0, 100)
+
+    def test_save_does_not_overwrite_totals(self):
+        client = ClientFactory()
+        stale = Client.objects.get(pk=client.pk)
+        TransactionFactory(client=client, amount=100)
+
+        stale.name = "Renamed"
+        stale.save()
+
+        client.refresh_from_db()
+        assert (client.name, client.balance()) == ("Renamed", 100)
+
+    def test_refresh_balances(self):
+        client = TransactionFactory(amount=100).client
+        Client.objects.update(income_total=0, current_balance=0)
+
+        Client.objects.refresh_balances()
+
+        client.refresh_from_db()
+        assert (client.total_income(), client.balance()) == (100, 100)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_payments_are_not_lost():
+    client = ClientFactory()
+
+    def pay():
+        TransactionFactory(client=client, amount=10)
+        connection.close()
+
+    threads = [threading.Thread(target=pay) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    client.refresh_from_db()
+    assert client.balance() == 50
+
+
+@pytest.mark.parametrize(
+    "day, months, expected",
+    [
+        (date(2024, 1, 15), 1, date(2024, 2, 15)),
+        (date(2024, 1, 31), 1, date(2024, 2, 29)),
+        (date(2023, 1, 31), 1, date(2023, 2, 28)),
+        (date(2024, 11, 30), 3, date(2025, 2, 28)),
+        (date(2024, 5, 31), 12, date(2025, 5, 31)),
+    ],
+)
+def test_add_months(day, months, expected):
+    assert add_months(day, months) == expected
+
+
+@pytest.mark.parametrize(
+    "phone, expected",
+    [("+970 59-123-4567", "970591234567"), ("(059) 1234567", "0591234567"), ("", None), (None, None), ("-", None)],
+)
+def test_normalize_phone(phone, expected):
+    assert normalize_phone(phone) == expected
+
+
+class TestClientSearch:
+    def test_save_normalizes_phone(self):
+        client = ClientFactory(phone="059-123 4567")
+        client.refresh_from_db()
+        assert client.phone == "0591234567"
+
+    def test_phone_prefix(self):
+        client = ClientFactory(name="Sami 0599", phone="0599123456")
+        ClientFactory(name="Other", phone="0561234567")
+        # a client whose number merely contains the digits doesn't match
+        ClientFactory(name="Third", phone="0560599123")
+
+        assert list(Client.objects.search("0599")) == [client]
+        assert list(Client.objects.search(" 059 912-3 ")) == [client]
+
+    def test_name(self):
+        client = ClientFactory(name="Ahmad Khalil")
+        ClientFactory(name="Sami Taha")
+
+        assert list(Client.objects.search("khal")) == [client]
+        assert list(Client.objects.search("AHMAD K")) == [client]
+
+    def test_empty_term(self):
+        ClientFactory.create_batch(2)
+        assert Client.objects.search("  ").count() == 2
+
+
+class TestRenewMemberships:
+    def test_start_dates(self):
+        today = date(2024, 3, 10)
+        membership_type = MembershipTypeFactory(duration_months=1, price=150)
+        active = MembershipFactory(start_date=date(2024, 3, 1), end_date=date(2024, 3, 20)).client
+        lapsed = MembershipFactory(start_date=date(2024, 1, 1), end_date=date(2024, 1, 31)).client
+        no_membership = ClientFactory()
+
+        Membership.objects.renew(Client.objects.all(), membership_type, today=today)
+
+        latest = {m.client_id: m for m in Membership.objects.filter(membership_type=membership_type)}
+        assert (latest[active.pk].start_date, latest[active.pk].end_date) == (date(2024, 3, 21), date(2024, 4, 20))
+        assert (latest[lapsed.pk].start_date, latest[lapsed.pk].end_date) == (today, date(2024, 4, 9))
+        assert latest[no_membership.pk].start_date == today
+
+    def test_updates_derived_data(self):
+        membership_type = MembershipTypeFactory(duration_months=3, price=400)
+        gym = GymFactory()
+        clients = ClientFactory.create_batch(3, gym=gym)
+
+        Membership.objects.renew(Client.objects.filter(gym=gym), membership_type)
+
+        today = timezone.now().date()
+        for client in Client.objects.filter(pk__in=[c.pk for c in clients]):
+            assert client.membership_end_date == add_months(today, 3) - timedelta(days=1)
+            assert client.membership_state == "active"
+            assert client.current_balance == 400
+            assert client.income_total == 400
+        total = GymDailyTotal.objects.get(gym=gym, date=today, transaction_type="income")
+        assert (total.total, total.count) == (1200, 3)
+        assert gym.total_income() == 1200
+
+    def test_without_income_transaction(self):
+        client = ClientFactory()
+        Membership.objects.renew(Client.objects.all(), MembershipTypeFactory(), add_income_transaction=False)
+
+        client.refresh_from_db()
+        assert client.membership_end_date is not None
+        assert client.current_balance == 0
+        assert not GymDailyTotal.objects.exists()
+
+    def test_query_count_is_constant(self, django_assert_num_queries):
+        membership_type = MembershipTypeFactory()
+        ClientFactory.create_batch(2)
+        with django_assert_num_queries(9) as captured:
+            Membership.objects.renew(Client.objects.all(), membership_type)
+        ClientFactory.create_batch(20)
+        with django_assert_num_queries(len(captured)):
+            Membership.objects.renew(Client.objects.all(), membership_type)
@@ -0,0 +1,80 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from gym_management_system.core.models import MembershipReminder
+from gym_management_system.core.reminders import ConsoleBackend, FileBackend, send_expiring_reminders
+
+from .factories import ClientFactory, GymFactory, MembershipFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def test_reminds_expiring_clients_once(tmp_path):
+    today = timezone.now().date()
+    gym = GymFactory(name="Downtown")
+    expiring = MembershipFactory(client__gym=gym, end_date=today + timedelta(days=3)).client
+    MembershipFactory(client__gym=gym, end_date=today + timedelta(days=30))
+    MembershipFactory(end_date=today - timedelta(days=1))
+    ClientFactory(gym=gym)
+    backend = FileBackend(tmp_path / "reminders.log")
+
+    assert send_expiring_reminders(backend=backend) == 1
+    assert send_expiring_reminders(backend=backend) == 0
+
+    [line] = (tmp_path / "reminders.log").read_text().splitlines()
+    assert line.startswith(expiring.phone)
+    assert f"{expiring.name}, your membership at Downtown ends on" in line
+    assert MembershipReminder.objects.get().client == expiring
+
+
+def test_renewal_makes_client_due_again():
+    today = timezone.now().date()
+    membership = MembershipFactory(end_date=today + timedelta(days=2))
+    stream = StringIO()
+    send_expiring_reminders(backend=ConsoleBackend(stream))
+
+    MembershipFactory(client=membership.client, start_date=today, end_date=today + timedelta(days=5))
+
+    assert send_expiring_reminders(backend=ConsoleBackend(stream)) == 1
+    assert MembershipReminder.objects.filter(client=membership.client).count() == 2
+
+
+def test_batches(django_assert_max_num_queries):
+    today = timezone.now().date()
+    gyms = GymFactory.create_batch(2)
+    for gym in gyms:
+        for days in range(5):
+            MembershipFactory(client__gym=gym, end_date=today + timedelta(days=days))
+    sent_batches = []
+
+    class RecordingBackend(ConsoleBackend):
+        def send_messages(self, reminders):
+            sent_batches.append(len(reminders))
+            return super().send_messages(reminders)
+
+    # a gym query plus, per gym, the client query and one insert per batch
+    with django_assert_max_num_queries(1 + 2 * (1 + 3)):
+        send_expiring_reminders(backend=RecordingBackend(StringIO()), batch_size=2)
+
+    assert sent_batches == [2, 2, 1, 2, 2, 1]
+
+
+def test_command(tmp_path, settings):
+    settings.MEMBERSHIP_REMINDER_FILE_PATH = str(tmp_path / "reminders.log")
+    today = timezone.now().date()
+    MembershipFactory(end_date=today + timedelta(days=10))
+    stdout = StringIO()
+
+    call_command(
+        "send_membership_reminders",
+        "--days=14",
+        "--backend=gym_management_system.core.reminders.FileBackend",
+        stdout=stdout,
+    )
+
+    assert "Sent 1 membership reminders." in stdout.getvalue()
+    assert len((tmp_path / "reminders.log").read_text().splitlines()) == 1
@@ -0,0 +1,151 @@
+import csv
+from datetime import date, timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+
+from gym_management_system.core.models import ReportJob
+from gym_management_system.core.reports import REPORTS, claim_next_job, run_job
+
+from .factories import ClientFactory, GymFactory, TransactionFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+
+
+def read_output(job):
+    with job.output.open("r") as file:
+        return list(csv.reader(file))
+
+
+def test_gym_pnl():
+    gym = GymFactory(name="Downtown")
+    client = ClientFactory(gym=gym)
+    TransactionFactory(client=client, amount=150, date=date(2024, 1, 5))
+    TransactionFactory(client=client, amount=40, date=date(2024, 1, 20), transaction_type="expense")
+    TransactionFactory(client=client, amount=100, date=date(2024, 2, 1))
+    TransactionFactory(amount=999, date=date(2024, 1, 5))
+    job = ReportJob.objects.create(kind="gym_pnl", gym=gym, start_date=date(2024, 1, 1), end_date=date(2024, 12, 31))
+
+    run_job(claim_next_job())
+
+    job.refresh_from_db()
+    assert (job.status, job.progress) == ("done", 100)
+    assert read_output(job) == [
+        ["gym", "month", "income", "expenses", "net"],
+        ["Downtown", "2024-01", "150.00", "40.00", "110.00"],
+        ["Downtown", "2024-02", "100.00", "0", "100.00"],
+    ]
+
+
+def test_transaction_history(monkeypatch):
+    monkeypatch.setattr("gym_management_system.core.reports.REPORT_CHUNK_SIZE", 2)
+    transactions = TransactionFactory.create_batch(5, date=date(2024, 3, 1))
+    TransactionFactory(date=date(2023, 3, 1))
+    job = ReportJob.objects.create(kind="transaction_history", start_date=date(2024, 1, 1))
+    progress = []
+    monkeypatch.setattr(ReportJob, "set_progress", lambda self, done, total: progress.append((done, total)))
+
+    run_job(claim_next_job())
+
+    job.refresh_from_db()
+    rows = read_output(job)
+    assert rows[0][:3] == ["id", "date", "type"]
+    assert [row[0] for row in rows[1:]] == [str(t.pk) for t in transactions]
+    assert progress == [(2, 5), (4, 5), (5, 5)]
+
+
+def test_failed_job_records_error(monkeypatch):
+    def broken(job, writer):
+        raise RuntimeError("boom")
+
+    monkeypatch.setitem(REPORTS, "gym_pnl", broken)
+    ReportJob.objects.create(kind="gym_pnl")
+
+    job = run_job(claim_next_job())
+
+    job.refresh_from_db()
+    assert job.status == "failed"
+    assert "RuntimeError: boom" in job.error
+    assert not job.output
+
+
+def test_claim_takes_oldest_pending_job():
+    first, second = ReportJob.objects.create(kind="gym_pnl"), ReportJob.objects.create(kind="gym_pnl")
+
+    assert claim_next_job() == first
+    assert claim_next_job() == second
+    assert claim_next_job() is None
+    assert set(ReportJob.objects.values_list("status", flat=True)) == {"running"}
+
+
+def test_claim_retakes_jobs_whose_worker_died():
+    now = timezone.now()
+    stale = ReportJob.objects.create(
+        kind="gym_pnl",
+        status="running",
+        started_at=now - timedelta(hours=1),
+        heartbeat_at=now - timedelta(minutes=20),
+        progress=40,
+    )
+    # running for hours, but still progressing
+    ReportJob.objects.create(
+        kind="gym_pnl", status="running", started_at=now - timedelta(hours=3), heartbeat_at=now - timedelta(minutes=1)
+    )
+
+    assert claim_next_job() == stale
+    stale.refresh_from_db()
+    assert (stale.status, stale.progress) == ("running", 0)
+    assert stale.started_at > now
+    assert stale.heartbeat_at > now
+    assert claim_next_job() is None
+
+
+def test_progress_beats_the_heartbeat():
+    job = ReportJob.objects.create(kind="gym_pnl", status="running", heartbeat_at=timezone.now() - timedelta(hours=1))
+    before = timezone.now()
+
+    job.set_progress(1, 4)
+
+    job.refresh_from_db()
+    assert job.progress == 25
+    assert job.heartbeat_at >= before
+
+
+# the worker closes stale connections between jobs, which needs autocommit
+@pytest.mark.django_db(transaction=True)
+def test_worker_command():
+    TransactionFactory()
+    ReportJob.objects.create(kind="transaction_history")
+    stdout = StringIO()
+
+    call_command("run_report_worker", "--once", stdout=stdout)
+
+    assert ReportJob.objects.get().status == "done"
+    assert "done" in stdout.getvalue()
+
+
+class TestReportJobAdmin:
+    def test_request_and_download(self, admin_client, admin_user):
+        response = admin_client.post(reverse("admin:core_reportjob_add"), {"kind": "gym_pnl"})
+        assert response.status_code == 302
+        job = ReportJob.objects.get()
+        assert (job.requested_by, job.status) == (admin_user, "pending")
+
+        run_job(claim_next_job())
+        response = admin_client.get(reverse("admin:core_reportjob_changelist"))
+        assert reverse("admin:core_reportjob_download", args=[job.pk]) in response.content.decode()
+
+        response = admin_client.get(reverse("admin:core_reportjob_download", args=[job.pk]))
+        assert b"".join(response.streaming_content).startswith(b"gym,month,income,expenses,net")
+
+    def test_change_page(self, admin_client):
+        job = ReportJob.objects.create(kind="gym_pnl")
+        assert admin_client.get(reverse("admin:core_reportjob_change", args=[job.pk])).status_code == 200
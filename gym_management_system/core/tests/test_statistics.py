@@ -0,0 +1,174 @@
+import threading
+import time
+from datetime import date, timedelta
+
+import pytest
+from django.contrib import admin
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+
+from gym_management_system.core import caching
+from gym_management_system.core.models import Gym, MembershipType, Transaction
+from gym_management_system.core.statistics import gym_statistics, membership_type_statistics
+
+from .factories import ClientFactory, GymFactory, MembershipFactory, MembershipTypeFactory, TransactionFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def gym():
+    gym = GymFactory(name="Downtown")
+    for client in ClientFactory.create_batch(2, gym=gym):
+        TransactionFactory(client=client, transaction_type="income", amount=100, date=date(2024, 1, 10))
+        TransactionFactory(client=client, transaction_type="income", amount=100, date=date(2024, 2, 10))
+        TransactionFactory(client=client, transaction_type="expense", amount=30, date=date(2024, 2, 10))
+    return gym
+
+
+class TestGymStatistics:
+    def test_counts_are_not_multiplied_by_transactions(self, gym):
+        [row] = gym_statistics()
+        assert (row["client_count"], row["income"], row["expenses"], row["net_balance"]) == (2, 400, 60, 340)
+
+    def test_period(self, gym):
+        [row] = gym_statistics(start_date=date(2024, 2, 1), end_date=date(2024, 2, 28))
+        assert (row["income"], row["expenses"]) == (200, 60)
+
+    def test_cached_until_transaction_written(
+        self, gym, django_assert_num_queries, django_capture_on_commit_callbacks
+    ):
+        gym_statistics()
+        with django_assert_num_queries(0):
+            gym_statistics()
+
+        with django_capture_on_commit_callbacks(execute=True):
+            TransactionFactory(client=gym.client_set.first(), transaction_type="income", amount=1)
+
+        [row] = gym_statistics()
+        assert row["income"] == 401
+
+    def test_cached_until_daily_totals_rebuilt(self, gym, django_capture_on_commit_callbacks):
+        gym_statistics()
+        # a bulk fix that bypasses the signals, as the rebuild_daily_totals command is meant to follow
+        Transaction.objects.update(amount=150)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            call_command("rebuild_daily_totals")
+
+        [row] = gym_statistics()
+        assert (row["income"], row["expenses"]) == (600, 300)
+
+    def test_view(self, gym, admin_client):
+        url = reverse("admin:gym-statistics")
+        response = admin_client.get(url, data={"start_date": "2024-02-01", "end_date": "2024-02-28"})
+        assert response.status_code == 200
+        assert response.context["gyms"][0]["income"] == 200
+
+    def test_view_requires_view_permission(self, rf, django_user_model):
+        request = rf.get(reverse("admin:gym-statistics"))
+        request.user = django_user_model.objects.create_user(email="staff@example.com", is_staff=True)
+        with pytest.raises(PermissionDenied):
+            admin.site._registry[Gym].statistics_view(request)
+
+    def test_view_invalid_period(self, gym, admin_client):
+        url = reverse("admin:gym-statistics")
+        response = admin_client.get(url, data={"start_date": "2024-03-01", "end_date": "2024-02-01"})
+        assert response.status_code == 200
+        assert response.context["form"].errors
+        assert response.context["gyms"][0]["income"] == 400
+
+
+@pytest.fixture
+def membership_types():
+    today = timezone.now().date()
+    monthly = MembershipTypeFactory(name="Monthly", price=50)
+    yearly = MembershipTypeFactory(name="Yearly", price=400, duration_months=12)
+    MembershipTypeFactory(name="Weekly", price=15)
+    lapsed, current = ClientFactory.create_batch(2)
+    # 31 + 29 days for one client, 30 for the other
+    MembershipFactory(client=lapsed, membership_type=monthly, start_date=date(2024, 1, 1), end_date=date(2024, 1, 31))
+    MembershipFactory(client=lapsed, membership_type=monthly, start_date=date(2024, 2, 1), end_date=date(2024, 2, 29))
+    MembershipFactory(
+        client=current,
+        membership_type=monthly,
+        start_date=today - timedelta(days=5),
+        end_date=today + timedelta(days=24),
+    )
+    MembershipFactory(client=lapsed, membership_type=yearly, start_date=date(2024, 1, 1), end_date=date(2024, 12, 31))
+    return monthly
+
+
+class TestMembershipTypeStatistics:
+    def test_figures(self, membership_types):
+        monthly, weekly, yearly = membership_type_statistics(start_date=date(2024, 1, 1), end_date=date(2024, 1, 31))
+
+        assert (monthly["active_members"], monthly["total_members"]) == (1, 2)
+        assert (monthly["memberships_sold"], monthly["revenue"]) == (1, 50)
+        assert monthly["average_tenure"] == 45
+        assert (weekly["total_members"], weekly["memberships_sold"], weekly["revenue"]) == (0, 0, 0)
+        assert weekly["average_tenure"] is None
+        assert (yearly["active_members"], yearly["revenue"], yearly["average_tenure"]) == (0, 400, 366)
+
+    def test_one_query(self, membership_types, django_assert_num_queries):
+        with django_assert_num_queries(1):
+            list(MembershipType.objects.with_analytics())
+
+    def test_cached_until_membership_written(
+        self, membership_types, django_assert_num_queries, django_capture_on_commit_callbacks
+    ):
+        membership_type_statistics()
+        with django_assert_num_queries(0):
+            membership_type_statistics()
+
+        with django_capture_on_commit_callbacks(execute=True):
+            MembershipFactory(membership_type=membership_types)
+
+        monthly = membership_type_statistics()[0]
+        assert (monthly["active_members"], monthly["total_members"]) == (2, 3)
+
+    def test_view(self, membership_types, admin_client):
+        url = reverse("admin:core_membershiptype_statistics")
+        response = admin_client.get(url, data={"start_date": "2024-02-01", "end_date": "2024-02-28"})
+        assert response.status_code == 200
+        assert response.context["membership_types"][0]["revenue"] == 50
+        assert url in admin_client.get(reverse("admin:core_membershiptype_changelist")).content.decode()
+
+
+class TestGetOrCompute:
+    def test_concurrent_misses_compute_once(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.3)
+            return "value"
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(caching.get_or_compute("test", "key", compute, 60)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert results == ["value"] * 5
+        assert len(calls) == 1
+
+    def test_invalidate(self, django_capture_on_commit_callbacks):
+        assert caching.get_or_compute("test", "key", lambda: 1, 60) == 1
+        with django_capture_on_commit_callbacks(execute=True):
+            caching.invalidate("test")
+        assert caching.get_or_compute("test", "key", lambda: 2, 60) == 2
@@ -1,3 +1,53 @@
-from django.shortcuts import render
+import hmac
 
-# Create your views here.
+from django.conf import settings
+from django.db import models
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils import timezone
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from prometheus_client.core import GaugeMetricFamily
+
+from . import caching
+from .metrics import get_registry
+from .models import Gym
+
+# how long the business gauges are cached, so frequent scrapes don't query the database each time
+BUSINESS_METRICS_CACHE_TIMEOUT = 60
+
+
+def active_memberships():
+    today = timezone.now().date()
+    return list(
+        Gym.objects.order_by("pk")
+        .annotate(active=models.Count("client", filter=models.Q(client__membership_end_date__gte=today)))
+        .values_list("pk", "name", "active")
+    )
+
+
+class BusinessCollector:
+    """Gauges read from the database at scrape time rather than counted by the workers."""
+
+    def collect(self):
+        gauge = GaugeMetricFamily(
+            "gym_active_memberships", "Clients with a current membership, by gym.", labels=["gym_id", "gym"]
+        )
+        memberships = caching.get_or_compute(
+            "metrics", "active-memberships", active_memberships, timeout=BUSINESS_METRICS_CACHE_TIMEOUT
+        )
+        for pk, name, active in memberships:
+            gauge.add_metric([str(pk), name], active)
+        yield gauge
+
+
+def metrics_view(request):
+    """
+    The metrics in the Prometheus text format, for staff users or a scraper sending METRICS_TOKEN.
+    """
+    token = settings.METRICS_TOKEN
+    authorization = request.headers.get("Authorization", "")
+    authorized = request.user.is_staff or (
+        token and hmac.compare_digest(authorization.encode(), f"Bearer {token}".encode())
+    )
+    if not authorized:
+        return HttpResponseForbidden()
+    return HttpResponse(generate_latest(get_registry(BusinessCollector())), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,15 @@
+'use strict';
+{
+    const $ = django.jQuery;
+    // AutocompleteFilter: reload the changelist filtered on the object picked in the box
+    $(document).on('change', '.autocomplete-filter select', function() {
+        const params = new URLSearchParams(window.location.search);
+        if (this.value) {
+            params.set(this.name, this.value);
+        } else {
+            params.delete(this.name);
+        }
+        params.delete('p');
+        window.location.search = params.toString();
+    });
+}